@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from css_analyzer import CSSAnalyzer
+from config import ANALYSIS_WORKERS, ANALYSIS_QUEUE_SIZE, ANALYSIS_MODE, INSTANCE_SAMPLES
+
+_worker_analyzer = None
+
+
+def _init_worker(mode=ANALYSIS_MODE, timed=False, samples=INSTANCE_SAMPLES):
+    global _worker_analyzer
+    _worker_analyzer = CSSAnalyzer(mode, timed, samples)
+
+
+def _analyze_in_worker(css_content, source_url):
+    return _worker_analyzer.analyze_css(css_content, source_url)
+
+
+def _analyze_file_in_worker(path, source_url):
+    return _worker_analyzer.analyze_css_file(path, source_url)
+
+
+class AnalysisPipeline:
+    def __init__(self, workers=ANALYSIS_WORKERS, queue_size=ANALYSIS_QUEUE_SIZE, mode=ANALYSIS_MODE, timed=False,
+                 samples=INSTANCE_SAMPLES):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.mode = mode
+        self.timed = timed
+        self.samples = samples
+        self.executor = None
+        self.queue = None
+        self.consumers = []
+
+    async def __aenter__(self):
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.mode, self.timed, self.samples))
+        self.queue = asyncio.Queue(self.queue_size)
+        self.consumers = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for consumer in self.consumers:
+            consumer.cancel()
+
+        await asyncio.gather(*self.consumers, return_exceptions=True)
+        self.consumers = []
+        self.executor.shutdown()
+        self.executor = None
+
+    async def analyze(self, css_content, source_url):
+        return await self._submit(_analyze_in_worker, css_content, source_url)
+
+    async def analyze_file(self, path, source_url):
+        return await self._submit(_analyze_file_in_worker, path, source_url)
+
+    async def _submit(self, func, *args):
+        if self.executor is None:
+            settings = (self.mode, self.timed, self.samples)
+            if _worker_analyzer is None or (_worker_analyzer.mode, _worker_analyzer.timed, _worker_analyzer.samples) != settings:
+                _init_worker(*settings)
+            return func(*args)
+
+        future = asyncio.get_running_loop().create_future()
+        queued = time.perf_counter()
+        await self.queue.put((func, args, future, queued))
+        return await future
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            func, args, future, queued = await self.queue.get()
+            queue_wait = time.perf_counter() - queued
+
+            try:
+                result = await loop.run_in_executor(self.executor, func, *args)
+
+                if self.timed:
+                    result['timings']['queue_wait_seconds'] = queue_wait
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.queue.task_done()
@@ -1,25 +1,253 @@
-import asyncio
-import json
-from visualizer import CSSVisualizationGenerator
-from website_crawler import WebsiteCSSCrawler
-from report_generator import generate_summary_report
-from config import OUTPUT_JSON, OUTPUT_TXT
+import argparse
+import sys
+from config import (OUTPUT_SITES, OUTPUT_JSON, OUTPUT_TXT, OUTPUT_TABLE, OUTPUT_DELTA, ANALYSIS_MODE, CRAWL_JOURNAL,
+                    WEBSITES, CHART_FORMAT, CHART_DPI)
 
+COMMANDS = ('crawl', 'analyze-local', 'merge', 'report', 'charts', 'export-json', 'clear-cache', 'profile-patterns',
+            'history')
 
-def creat_report_and_vizualizations():
-    crawler = WebsiteCSSCrawler()
-    results = asyncio.run(crawler.analyze_all_websites())
 
-    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+def creat_report_and_vizualizations(use_cache=True, workers=None, mode=ANALYSIS_MODE, resume=False,
+                                    chart_format=CHART_FORMAT, chart_dpi=CHART_DPI, charts=True, trace_file=None,
+                                    trace=False, incremental=False, history=True, json_export=True):
+    import asyncio
+    from website_crawler import WebsiteCSSCrawler
+    from crawl_journal import CrawlJournal
 
-    report = generate_summary_report(results)
+    crawler = WebsiteCSSCrawler(use_cache=use_cache, workers=workers, mode=mode, trace=trace or bool(trace_file),
+                                previous=previous_results(incremental))
 
-    with open(OUTPUT_TXT, 'w', encoding='utf-8') as f:
-         f.write(report)
+    with CrawlJournal(CRAWL_JOURNAL, resume=resume) as journal:
+        asyncio.run(crawler.analyze_all_websites(journal))
+        journal.export_sites(OUTPUT_SITES)
+
+        if json_export:
+            journal.export(OUTPUT_JSON)
+
+        if history:
+            record_history(journal.iter_results())
+
+    report_trace(crawler.tracer, trace_file)
+
+    write_report(OUTPUT_SITES, OUTPUT_TXT, OUTPUT_TABLE)
+
+    if charts:
+        render_charts(OUTPUT_TABLE, chart_format, chart_dpi)
+
+
+def crawl_shard(shard, journal_path=None, use_cache=True, workers=None, mode=ANALYSIS_MODE, resume=False,
+                trace_file=None, trace=False, incremental=False):
+    import asyncio
+    from website_crawler import WebsiteCSSCrawler
+    from crawl_journal import CrawlJournal
+    from crawl_shards import parse_shard, shard_websites, shard_journal_path
+
+    index, count = parse_shard(shard)
+    journal_path = journal_path or shard_journal_path(index, count)
+    crawler = WebsiteCSSCrawler(use_cache=use_cache, workers=workers, mode=mode, trace=trace or bool(trace_file),
+                                previous=previous_results(incremental))
+
+    with CrawlJournal(journal_path, resume=resume) as journal:
+        asyncio.run(crawler.analyze_all_websites(journal, shard_websites(WEBSITES, index, count)))
+
+    report_trace(crawler.tracer, trace_file)
+
+    return journal_path
+
+
+def previous_results(incremental):
+    if not incremental:
+        return None
+
+    from crawl_history import CrawlHistory
+    return CrawlHistory().latest_results()
+
+
+def record_history(sites, delta_path=OUTPUT_DELTA):
+    from crawl_history import record_run, format_recorded
+
+    run, delta = record_run(sites, delta_path)
+    print(format_recorded(run, delta, delta_path))
+
+
+def report_trace(tracer, trace_file=None):
+    if not tracer.enabled:
+        return
+
+    print(tracer.summary())
+
+    if trace_file:
+        tracer.write_chrome_trace(trace_file)
+        print(f"Трасса записана в {trace_file} (chrome://tracing, Perfetto)")
+
+
+def write_report(results_path=OUTPUT_SITES, report_path=OUTPUT_TXT, table_path=None):
+    from report_generator import generate_summary_report, report_stats
+
+    if table_path is None:
+        # JSON/JSONL results are aggregated without numpy; only a .npz table needs it
+        stats = report_stats(results_path)
+    else:
+        from usage_stats import UsageStats
+        from results_table import ResultsTable
+        stats = UsageStats.save(ResultsTable.from_file(results_path), table_path)
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(generate_summary_report(stats))
+
+    return stats
+
+
+def render_charts(results_path=OUTPUT_TABLE, chart_format=CHART_FORMAT, chart_dpi=CHART_DPI, workers=None):
+    from visualizer import CSSVisualizationGenerator, format_chart_results
+
+    viz_gen = CSSVisualizationGenerator(results_path, chart_format, chart_dpi)
+    print(format_chart_results(viz_gen.generate_all(workers)))
+
+
+def run_crawl(args):
+    if args.shard:
+        journal_path = crawl_shard(
+            args.shard,
+            args.journal,
+            use_cache=not args.no_cache,
+            workers=args.workers,
+            mode=args.mode,
+            resume=args.resume,
+            trace_file=args.trace_file,
+            trace=args.trace,
+            incremental=args.incremental
+        )
+        print(f"Шард {args.shard} записан в {journal_path}")
+    else:
+        creat_report_and_vizualizations(
+            use_cache=not args.no_cache,
+            workers=args.workers,
+            mode=args.mode,
+            resume=args.resume,
+            chart_format=args.chart_format,
+            chart_dpi=args.chart_dpi,
+            charts=not args.no_charts,
+            trace_file=args.trace_file,
+            trace=args.trace,
+            incremental=args.incremental,
+            history=not args.no_history,
+            json_export=not args.no_json
+        )
+
+
+def run_analyze_local(args):
+    import analyze_local
+    analyze_local.main(args.args)
+
+
+def run_merge(args):
+    import crawl_shards
+    crawl_shards.main(args.args)
+
+
+def run_profile_patterns(args):
+    import pattern_profiler
+    pattern_profiler.main(args.args)
+
+
+def run_history(args):
+    import crawl_history
+    crawl_history.main(args.args)
+
+
+def run_report(args):
+    write_report(args.input, args.output)
+
+
+def run_charts(args):
+    render_charts(args.input, args.chart_format, args.chart_dpi, args.workers)
+
+
+def run_export_json(args):
+    from results_file import export_json
+    export_json(args.input, args.output)
+
+
+def run_clear_cache(args):
+    from stylesheet_cache import StylesheetCache
+    StylesheetCache().clear()
+
+
+FORWARDED = {'analyze-local': run_analyze_local, 'merge': run_merge, 'profile-patterns': run_profile_patterns,
+             'history': run_history}
+
+
+def add_chart_arguments(parser):
+    parser.add_argument('--chart-format', choices=['png', 'svg'], default=CHART_FORMAT,
+                        help='формат графиков; svg не зависит от --chart-dpi')
+    parser.add_argument('--chart-dpi', type=int, default=CHART_DPI, help='разрешение PNG-графиков')
+
+
+def parse_args(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # The old flags still work: "--clear-cache" alone, anything else means a crawl
+    if argv == ['--clear-cache']:
+        argv = ['clear-cache']
+    elif not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv = ['crawl'] + argv
+
+    # Forwarded commands keep their own parsers, so their arguments (including -h) go through unchanged
+    if argv[0] in FORWARDED:
+        return argparse.Namespace(command=argv[0], args=argv[1:], run=FORWARDED[argv[0]])
+
+    parser = argparse.ArgumentParser(description='Анализ использования современных CSS-возможностей')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    crawl = commands.add_parser('crawl', help='краулинг сайтов, отчет и графики (по умолчанию)')
+    crawl.add_argument('--no-cache', action='store_true', help='не использовать кэш CSS-файлов')
+    crawl.add_argument('--workers', type=int, default=None, help='число процессов для анализа CSS')
+    crawl.add_argument('--resume', action='store_true',
+                       help='продолжить прерванный запуск: пропустить готовые сайты, повторить сайты с ошибками')
+    crawl.add_argument('--shard', help='обработать только шард i/N (объединение: команда merge)')
+    crawl.add_argument('--journal', help='путь к журналу шарда')
+    crawl.add_argument('--mode', choices=['regex', 'tokens'], default=ANALYSIS_MODE,
+                       help='regex - поиск по шаблонам, tokens - токенизатор без комментариев и строк')
+    crawl.add_argument('--no-charts', action='store_true', help='не строить графики')
+    crawl.add_argument('--trace', action='store_true',
+                       help='замерять этапы: время и байты по сайтам и CSS-файлам в JSON, сводка в конце')
+    crawl.add_argument('--incremental', action='store_true',
+                       help='не анализировать сайты, у которых набор CSS не изменился с прошлого запуска')
+    crawl.add_argument('--no-history', action='store_true', help='не сохранять запуск в истории')
+    crawl.add_argument('--no-json', action='store_true',
+                       help='не писать css_usage_analysis.json (результаты остаются в css_usage_sites.jsonl)')
+    crawl.add_argument('--trace-file', help='записать трассу в формате Chrome Trace (включает --trace)')
+    add_chart_arguments(crawl)
+    crawl.set_defaults(run=run_crawl)
+
+    commands.add_parser('analyze-local', help='анализ сохраненного корпуса (analyze_local.py)')
+    commands.add_parser('merge', help='объединение журналов шардов (crawl_shards.py)')
+    commands.add_parser('profile-patterns', help='стоимость шаблонов CSS_FEATURES (pattern_profiler.py)')
+    commands.add_parser('history', help='история запусков и изменения между ними (crawl_history.py)')
+
+    report = commands.add_parser('report', help='текстовый отчет по готовым результатам (.jsonl, JSON) или таблице .npz')
+    report.add_argument('--input', default=OUTPUT_SITES)
+    report.add_argument('--output', default=OUTPUT_TXT)
+    report.set_defaults(run=run_report)
+
+    charts = commands.add_parser('charts', help='графики по готовым результатам (.jsonl, JSON) или таблице .npz')
+    charts.add_argument('--input', default=OUTPUT_SITES)
+    charts.add_argument('--workers', type=int, default=None, help='число процессов для построения графиков')
+    add_chart_arguments(charts)
+    charts.set_defaults(run=run_charts)
+
+    export = commands.add_parser('export-json', help='css_usage_analysis.json в прежнем формате из результатов .jsonl')
+    export.add_argument('--input', default=OUTPUT_SITES)
+    export.add_argument('--output', default=OUTPUT_JSON)
+    export.set_defaults(run=run_export_json)
+
+    clear_cache = commands.add_parser('clear-cache', help='очистить кэш CSS-файлов')
+    clear_cache.set_defaults(run=run_clear_cache)
+
+    return parser.parse_args(argv)
 
-    viz_gen = CSSVisualizationGenerator(OUTPUT_JSON)
-    viz_gen.generate_all()
 
 if __name__ == '__main__':
-    creat_report_and_vizualizations()
+    args = parse_args()
+    args.run(args)
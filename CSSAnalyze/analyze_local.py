@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import json
+import os
+
+from css_analyzer import CSSAnalyzer
+from analysis_pipeline import AnalysisPipeline
+from local_corpus import open_corpus
+from crawl_journal import CrawlJournal
+from crawl_shards import parse_shard, shard_websites, shard_journal_path
+from report_generator import generate_summary_report
+from results_table import ResultsTable, iter_sites
+from results_file import write_sites
+from usage_stats import UsageStats
+from style_extractor import import_urls, IMPORT_SCAN_CHARS
+from crawl_errors import classify_exception, error_fields
+from site_summary import empty_site_results, summarize_features, assemble_results
+from config import (WEBSITES, OUTPUT_SITES, OUTPUT_JSON, OUTPUT_TXT, OUTPUT_TABLE, STREAMING_THRESHOLD, MAX_IMPORT_DEPTH,
+                    ANALYSIS_MODE)
+
+
+class LocalCorpusAnalyzer:
+    def __init__(self, corpus, workers=None, mode=ANALYSIS_MODE):
+        self.corpus = corpus
+        self.css_analyzer = CSSAnalyzer(mode)
+        self.pipeline = AnalysisPipeline(workers, mode=mode)
+
+    async def analyze_stylesheets(self, css_urls, seen, depth=0):
+        css_urls = [css_url for css_url in dict.fromkeys(css_urls) if css_url not in seen]
+        seen.update(css_urls)
+
+        css_analyses = await asyncio.gather(*[
+            self.analyze_stylesheet(css_url, seen, depth) for css_url in css_urls
+        ])
+
+        return [analysis for analyses in css_analyses for analysis in analyses]
+
+    async def analyze_stylesheet(self, css_url, seen, depth=0):
+        path = self.corpus.locate(css_url) if hasattr(self.corpus, 'locate') else None
+
+        if path and os.path.getsize(path) > STREAMING_THRESHOLD:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                head = f.read(IMPORT_SCAN_CHARS)
+            analysis = self.pipeline.analyze_file(path, css_url)
+        else:
+            css_content = self.corpus.read(css_url)
+
+            if not css_content:
+                return []
+
+            head = css_content
+            analysis = self.pipeline.analyze(css_content, css_url)
+
+        imports = import_urls(head, css_url) if depth < MAX_IMPORT_DEPTH else []
+        analysis, imported = await asyncio.gather(analysis, self.analyze_stylesheets(imports, seen, depth + 1))
+
+        return [analysis, *imported]
+
+    async def analyze_page(self, site_results, url):
+        html = self.corpus.read(url)
+
+        if html is None:
+            site_results.update(error_fields("page_not_found", url))
+            return site_results
+
+        inline_css, css_links = self.css_analyzer.extract_styles(html, url)
+
+        if inline_css:
+            site_results['inline_css'] = await self.pipeline.analyze(inline_css, f"{url} (inline)")
+
+        site_results['external_css'] = await self.analyze_stylesheets(css_links, set())
+
+        return summarize_features(site_results)
+
+    async def analyze_website(self, name, url):
+        """Site results; a broken record fails only its own site, with an error code like a crawl failure."""
+        try:
+            return await self.analyze_page(empty_site_results(name, url), url)
+        except Exception as e:
+            site_results = empty_site_results(name, url)
+            site_results.update(error_fields(classify_exception(e), f"{type(e).__name__}: {e}"))
+            return site_results
+
+    async def analyze_website_limited(self, limit, name, url):
+        async with limit:
+            return await self.analyze_website(name, url)
+
+    async def analyze_pending(self, journal, pending):
+        for cat_name, site_name, site_url in pending:
+            journal.append(cat_name, site_name, await self.analyze_website(site_name, site_url))
+
+    async def analyze_all_websites(self, websites=WEBSITES, journal=None):
+        limit = asyncio.Semaphore(self.pipeline.workers * 2)
+
+        async with self.pipeline:
+            if journal is not None:
+                pending = journal.pending(websites)
+                await asyncio.gather(*[
+                    self.analyze_pending(journal, pending) for _ in range(self.pipeline.workers * 2)
+                ])
+                return journal
+
+            tasks = {
+                (cat_name, site_name): asyncio.create_task(
+                    self.analyze_website_limited(limit, site_name, site_url)
+                )
+                for cat_name, category_sites in websites.items()
+                for site_name, site_url in category_sites.items()
+            }
+
+            await asyncio.gather(*tasks.values())
+
+        return assemble_results(lambda cat_name, site_name: tasks[(cat_name, site_name)].result(), websites)
+
+
+def analyze_corpus(path, workers=None, websites=WEBSITES, mode=ANALYSIS_MODE, journal=None):
+    corpus = open_corpus(path)
+
+    try:
+        return asyncio.run(LocalCorpusAnalyzer(corpus, workers, mode).analyze_all_websites(websites, journal))
+    finally:
+        corpus.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Анализ сохраненных страниц и CSS (каталог, tar или WARC) без краулинга'
+    )
+    parser.add_argument('corpus', help='каталог в формате wget --mirror (хост/путь), tar-архив или WARC')
+    parser.add_argument('--sites', default=OUTPUT_SITES, help='результаты по одному сайту на строку (.jsonl)')
+    parser.add_argument('--output', default=OUTPUT_JSON, help='результаты в прежнем формате одного JSON')
+    parser.add_argument('--no-json', action='store_true', help='не писать --output, только --sites')
+    parser.add_argument('--report', default=OUTPUT_TXT)
+    parser.add_argument('--table', default=OUTPUT_TABLE, help='колоночная таблица результатов (.npz)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--mode', choices=['regex', 'tokens'], default=ANALYSIS_MODE,
+                        help='regex - поиск по шаблонам, tokens - токенизатор без комментариев и строк')
+    parser.add_argument('--shard', help='обработать только шард i/N; результат пишется в журнал шарда')
+    parser.add_argument('--journal', help='путь к журналу шарда')
+    parser.add_argument('--resume', action='store_true', help='продолжить шард, пропуская готовые сайты')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.shard:
+        index, count = parse_shard(args.shard)
+        journal_path = args.journal or shard_journal_path(index, count)
+
+        with CrawlJournal(journal_path, resume=args.resume) as journal:
+            analyze_corpus(args.corpus, args.workers, shard_websites(WEBSITES, index, count), args.mode, journal)
+
+        print(f"Шард {index}/{count} записан в {journal_path}")
+        return
+
+    results = analyze_corpus(args.corpus, args.workers, mode=args.mode)
+
+    write_sites(args.sites, iter_sites(results))
+
+    if not args.no_json:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    stats = UsageStats.save(ResultsTable.from_results(results), args.table)
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        f.write(generate_summary_report(stats))
+
+
+if __name__ == '__main__':
+    main()
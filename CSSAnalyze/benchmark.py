@@ -0,0 +1,696 @@
+import argparse
+import asyncio
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from css_analyzer import CSSAnalyzer
+from analysis_pipeline import AnalysisPipeline
+from report_generator import generate_summary_report
+from results_table import ResultsTable, iter_sites
+from results_file import write_sites
+from usage_stats import UsageStats
+from config import CSS_FEATURES
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+KB = 1024
+MB = 1024 * 1024
+
+CSS_SIZES = [KB, 64 * KB, MB, 10 * MB, 50 * MB]
+HTML_LINKS = [100, 1000]
+REPORT_SITES = [100, 1000, 10000]
+REPORT_FILE_SITES = [10000]
+CHART_SITES = [100, 1000]
+TABLE_SITES = [1000, 100000]
+BATCH_FRAGMENTS = [1000, 10000]
+HISTORY_RUNS = [200]
+HISTORY_SITES = 1000
+SPARSE_HIT_RATE = 0.01
+MIN_CASE_SECONDS = 1.0
+STARTUP_BUDGET_MS = 120
+STARTUP_SITES = 16
+HEAVY_MODULES = ('numpy', 'matplotlib', 'seaborn', 'crawl4ai', 'httpx', 'playwright')
+
+MINIFIED_RULES = [
+    '.btn{color:#fff;background:rgba(0,0,0,.5);padding:4px 8px}',
+    '.card:has(>img){display:grid;gap:8px}',
+    '.title{color:color(display-p3 1 0 0)}',
+    '.nav a{margin:0 auto;font:14px/1.4 "Helvetica Neue",sans-serif}',
+    '.panel{border:1px solid #ddd;border-radius:4px}',
+    '.row:has(.cell:hover){background:oklch(70% .1 200)}',
+]
+
+
+FEATURE_RULES = MINIFIED_RULES + [
+    '@container sidebar (min-width:400px){.card{display:flex}}',
+    '.grid>.item{display:grid;grid-template-columns:subgrid}',
+    '.menu{color:#333;&:hover{color:#000}& .icon{width:16px}}',
+    '@layer base,components;@layer base{html{color:#111}}',
+]
+
+PLAIN_RULES = [
+    '.btn{color:#fff;background:#333;padding:4px 8px}',
+    '.nav a{margin:0 auto;font:14px/1.4 "Helvetica Neue",sans-serif}',
+    '.panel{border:1px solid #ddd;border-radius:4px}',
+    'h1,h2,h3{font-weight:600;line-height:1.2}',
+    '.list>li+li{margin-top:8px}',
+    '@media (max-width:600px){.sidebar{display:none}}',
+]
+
+
+def single_line_bundle(size, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+
+    while total < size:
+        rule = rng.choice(MINIFIED_RULES)
+        parts.append(rule)
+        total += len(rule)
+
+    return ''.join(parts)[:size]
+
+
+def prettify(rule):
+    return rule.replace('{', ' {\n  ').replace(';', ';\n  ').replace('}', '\n}\n')
+
+
+def synthetic_css(size, dense=True, pretty=False, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+
+    while total < size:
+        if dense or rng.random() < SPARSE_HIT_RATE:
+            rule = rng.choice(FEATURE_RULES)
+        else:
+            rule = rng.choice(PLAIN_RULES)
+
+        if pretty:
+            rule = prettify(rule)
+
+        parts.append(rule)
+        total += len(rule)
+
+    return ''.join(parts)[:size]
+
+
+def synthetic_html(links, inline_size=MB, seed=0):
+    rng = random.Random(seed)
+    head = []
+
+    for i in range(links):
+        kind = rng.random()
+        if kind < 0.6:
+            head.append(f'<link rel="stylesheet" href="/static/css/bundle-{i}.css">')
+        elif kind < 0.8:
+            head.append(f"<link href='https://cdn.example.com/{i}/theme.css' rel='stylesheet' media='print'>")
+        else:
+            head.append(f'<link rel="preload" href="/static/fonts/font-{i}.woff2" as="font">')
+
+    blocks = max(1, links // 10)
+    block_size = inline_size // blocks
+
+    body = []
+    for i in range(blocks):
+        body.append(f'<div class="section-{i}"><p>Lorem ipsum dolor sit amet</p></div>')
+        body.append(f'<style>{synthetic_css(block_size, dense=i % 2 == 0, seed=seed + i)}</style>')
+
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Benchmark</title>'
+        + '\n'.join(head)
+        + '</head><body>'
+        + '\n'.join(body)
+        + '</body></html>'
+    )
+
+
+def synthetic_results(sites, seed=0):
+    rng = random.Random(seed)
+    categories = ['news', 'shops', 'tech', 'social', 'media']
+    results = {"total_sites": sites, "categories": {}}
+
+    for i in range(sites):
+        cat_name = categories[i % len(categories)]
+        category = results['categories'].setdefault(cat_name, {"total_sites": 0, "sites": {}})
+        category['total_sites'] += 1
+
+        site_name = f"site-{i}"
+        site_data = {
+            "name": site_name,
+            "url": f"https://{site_name}.example.com",
+            "inline_css": {},
+            "external_css": [],
+            "features_summary": {},
+            "total_features_found": 0
+        }
+
+        if rng.random() < 0.05:
+            site_data['error'] = "Timeout 30000ms exceeded"
+        else:
+            for feature_key, feature_data in CSS_FEATURES.items():
+                if rng.random() < 0.4:
+                    site_data['features_summary'][feature_key] = {
+                        "name": feature_data['name'],
+                        "total_occurrences": rng.randint(1, 500),
+                        "description": feature_data['description']
+                    }
+            site_data['total_features_found'] = len(site_data['features_summary'])
+
+        category['sites'][site_name] = site_data
+
+    return results
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_bundle(name, css):
+    results, seconds = timed(CSSAnalyzer().analyze_css, css, f'synthetic-{name}.css')
+
+    return {
+        "name": name,
+        "bytes": len(css),
+        "lines": results['total_lines'],
+        "hits": sum(feature['count'] for feature in results['features'].values()),
+        "seconds": seconds,
+        "mb_per_s": len(css) / MB / seconds if seconds else 0,
+    }
+
+
+def bench_single_line_bundle(size=5 * MB):
+    return bench_bundle("single_line_bundle", single_line_bundle(size))
+
+
+def bench_multi_line_bundle(size=5 * MB):
+    """A formatted bundle full of matches: line numbers come from the LineIndex bisect, not the one-line shortcut."""
+    return bench_bundle("multi_line_bundle", synthetic_css(size, dense=True, pretty=True))
+
+
+def local_corpus(files, size):
+    return [single_line_bundle(size, seed=i) for i in range(files)]
+
+
+async def run_pipeline(corpus, workers):
+    async with AnalysisPipeline(workers) as pipeline:
+        await asyncio.gather(*[
+            pipeline.analyze(css, f"corpus-{i}.css") for i, css in enumerate(corpus)
+        ])
+
+
+def bench_pipeline_scaling(files=32, size=MB, max_workers=None):
+    corpus = local_corpus(files, size)
+    total_bytes = sum(len(css) for css in corpus)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    results = []
+    workers = 1
+
+    while workers <= max_workers:
+        _, seconds = timed(asyncio.run, run_pipeline(corpus, workers))
+        results.append({
+            "name": f"pipeline_{workers}_workers",
+            "workers": workers,
+            "bytes": total_bytes,
+            "seconds": seconds,
+            "mb_per_s": total_bytes / MB / seconds if seconds else 0,
+        })
+        workers *= 2
+
+    return results
+
+
+def bench_modes(size=10 * MB, repeat=5):
+    """MB/s of both modes per bundle: the median of `repeat` interleaved runs, so one noisy run does not decide."""
+    analyzers = {mode: CSSAnalyzer(mode) for mode in ('regex', 'tokens')}
+    results = []
+
+    for pretty in (False, True):
+        for dense in (True, False):
+            css = synthetic_css(size, dense, pretty)
+            result = {
+                "name": f"{'pretty' if pretty else 'minified'}/{'dense' if dense else 'sparse'}",
+                "bytes": len(css),
+            }
+
+            runs = {mode: [] for mode in analyzers}
+            for _ in range(repeat):
+                for mode, analyzer in analyzers.items():
+                    runs[mode].append(timed(analyzer.analyze_css, css, 'synthetic.css')[1])
+
+            for mode, seconds in runs.items():
+                seconds = statistics.median(seconds)
+                result[mode] = len(css) / MB / seconds if seconds else 0
+
+            results.append(result)
+
+    return results
+
+
+def format_size(size):
+    if size >= MB:
+        return f"{size // MB}MB"
+    return f"{size // KB}KB"
+
+
+def css_case(workdir, size, dense, pretty, mode='regex'):
+    css = synthetic_css(size, dense, pretty)
+    return CSSAnalyzer(mode).analyze_css, (css, 'synthetic.css'), len(css)
+
+
+def css_fragments(count, seed=0):
+    rng = random.Random(seed)
+    css = synthetic_css(count * 300, dense=False, seed=seed)
+    fragments = []
+    position = 0
+
+    for i in range(count):
+        size = rng.randint(0, 600)
+        fragments.append((f"fragment-{i}.css", css[position:position + size]))
+        position += size
+
+    return fragments
+
+
+def analyze_each(analyzer, fragments):
+    return [analyzer.analyze_css(css_content, source_url) for source_url, css_content in fragments]
+
+
+def analyze_batch(analyzer, fragments):
+    return list(analyzer.analyze_batch(fragments))
+
+
+def fragments_case(workdir, count, batch):
+    fragments = css_fragments(count)
+    size = sum(len(css_content) for _, css_content in fragments)
+    return analyze_batch if batch else analyze_each, (CSSAnalyzer(), fragments), size
+
+
+def inline_styles_case(workdir, links):
+    html = synthetic_html(links)
+    return CSSAnalyzer().extract_inline_styles, (html,), len(html)
+
+
+def css_links_case(workdir, links):
+    html = synthetic_html(links)
+    return CSSAnalyzer().extract_css_links, (html, 'https://example.com/'), len(html)
+
+
+def styles_case(workdir, links):
+    html = synthetic_html(links)
+    return CSSAnalyzer().extract_styles, (html, 'https://example.com/'), len(html)
+
+
+def report_case(workdir, sites):
+    results = synthetic_results(sites)
+    return generate_summary_report, (results,), len(json.dumps(results, ensure_ascii=False))
+
+
+def report_from_file(path):
+    return generate_summary_report(ResultsTable.from_file(path))
+
+
+def report_file_case(workdir, sites, layout):
+    results = synthetic_results(sites)
+    path = os.path.join(workdir, f'results.{layout}')
+
+    if layout == 'jsonl':
+        websites = {
+            cat_name: {site_name: site_data['url'] for site_name, site_data in cat_data['sites'].items()}
+            for cat_name, cat_data in results['categories'].items()
+        }
+        write_sites(path, iter_sites(results), websites)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    return report_from_file, (path,), os.path.getsize(path)
+
+
+def aggregate_table(path):
+    UsageStats(ResultsTable.load(path))
+
+
+def table_case(workdir, sites):
+    path = os.path.join(workdir, 'results.npz')
+    ResultsTable.from_results(synthetic_results(sites)).save(path)
+
+    return aggregate_table, (path,), os.path.getsize(path)
+
+
+def history_case(workdir, runs):
+    from crawl_history import CrawlHistory, snapshot_columns, run_id
+    from results_table import iter_sites
+
+    history = CrawlHistory(workdir)
+    snapshots = [snapshot_columns(iter_sites(synthetic_results(HISTORY_SITES, seed=seed))) for seed in range(10)]
+
+    # Snapshots only: deltas never read the full results
+    for run in range(runs):
+        history.save_snapshot(run_id(run * 3600), snapshots[run % len(snapshots)])
+
+    return history.changes, (), sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+
+
+def render_charts(json_path):
+    from visualizer import CSSVisualizationGenerator
+    CSSVisualizationGenerator(json_path).generate_all()
+
+
+def charts_case(workdir, sites):
+    import visualizer
+    visualizer.VISUALIZATIONS_DIR = os.path.join(workdir, 'visualizations')
+
+    json_path = os.path.join(workdir, 'results.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(synthetic_results(sites), f, ensure_ascii=False)
+
+    return render_charts, (json_path,), os.path.getsize(json_path)
+
+
+def suite_cases(max_size=50 * MB, charts=True):
+    cases = []
+
+    for mode, prefix in (('regex', 'analyze_css'), ('tokens', 'analyze_css_tokens')):
+        for size in CSS_SIZES:
+            if size > max_size:
+                continue
+            for pretty in (False, True):
+                for dense in (True, False):
+                    layout = 'pretty' if pretty else 'minified'
+                    density = 'dense' if dense else 'sparse'
+                    cases.append((f"{prefix}/{layout}/{density}/{format_size(size)}", css_case,
+                                  (size, dense, pretty, mode)))
+
+    for count in BATCH_FRAGMENTS:
+        cases.append((f"analyze_css_each/{count}_fragments", fragments_case, (count, False)))
+        cases.append((f"analyze_batch/{count}_fragments", fragments_case, (count, True)))
+
+    for links in HTML_LINKS:
+        cases.append((f"extract_inline_styles/{links}_links", inline_styles_case, (links,)))
+        cases.append((f"extract_css_links/{links}_links", css_links_case, (links,)))
+        cases.append((f"extract_styles/{links}_links", styles_case, (links,)))
+
+    for sites in REPORT_SITES:
+        cases.append((f"generate_summary_report/{sites}_sites", report_case, (sites,)))
+
+    for sites in REPORT_FILE_SITES:
+        for layout in ('json', 'jsonl'):
+            cases.append((f"report_file/{layout}/{sites}_sites", report_file_case, (sites, layout)))
+
+    for sites in TABLE_SITES:
+        cases.append((f"results_table/{sites}_sites", table_case, (sites,)))
+
+    for runs in HISTORY_RUNS:
+        cases.append((f"crawl_history/{runs}_runs", history_case, (runs,)))
+
+    if charts and importlib.util.find_spec('matplotlib') is not None:
+        for sites in CHART_SITES:
+            cases.append((f"generate_all/{sites}_sites", charts_case, (sites,)))
+
+    return cases
+
+
+def peak_rss():
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * KB
+
+
+def run_case(builder, params, trace=True, min_seconds=MIN_CASE_SECONDS):
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+
+        try:
+            func, args, size = builder(workdir, *params)
+
+            timings = []
+            started = time.perf_counter()
+            while not timings or time.perf_counter() - started < min_seconds:
+                timings.append(timed(func, *args)[1])
+
+            seconds = min(timings)
+            result = {
+                "bytes": size,
+                "runs": len(timings),
+                "seconds": seconds,
+                "mb_per_s": size / MB / seconds if seconds else 0,
+                "peak_rss": peak_rss(),
+            }
+
+            if trace:
+                tracemalloc.start()
+                try:
+                    func(*args)
+                    result['alloc_retained'], result['alloc_peak'] = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+        finally:
+            sys.stdout = stdout
+
+    return result
+
+
+def run_suite(cases, trace=True, min_seconds=MIN_CASE_SECONDS):
+    context = multiprocessing.get_context('spawn')
+    results = {}
+
+    for name, builder, params in cases:
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            result = executor.submit(run_case, builder, params, trace, min_seconds).result()
+
+        results[name] = result
+        print_case(name, result)
+
+    return results
+
+
+def print_case(name, result):
+    line = (f"{name:<48} {result['bytes'] / MB:>8.3f} MB {result['seconds']:>10.5f} с "
+            f"{result['mb_per_s']:>9.1f} MB/s")
+
+    if result.get('peak_rss') is not None:
+        line += f"  RSS {result['peak_rss'] / MB:>7.1f} MB"
+
+    if 'alloc_peak' in result:
+        line += f"  аллокации {result['alloc_peak'] / MB:>7.1f} MB"
+
+    print(line)
+
+
+def import_times(stderr):
+    total = 0
+    modules = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line.split('|')
+        modules[name.strip()] = int(cumulative) / 1000
+
+        # Only top-level imports, nested ones are already in their parent's cumulative time
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+
+    return total / 1000, modules
+
+
+def bench_startup(sites=STARTUP_SITES):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyze.py')
+
+    with tempfile.TemporaryDirectory() as workdir:
+        json_path = os.path.join(workdir, 'results.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(synthetic_results(sites), f, ensure_ascii=False)
+
+        command = ['report', '--input', json_path, '--output', os.path.join(workdir, 'report.txt')]
+
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', script] + command,
+            capture_output=True,
+            text=True
+        )
+        seconds = time.perf_counter() - started
+
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+
+    import_ms, modules = import_times(completed.stderr)
+
+    return {
+        "name": "analyze.py report",
+        "import_ms": import_ms,
+        "seconds": seconds,
+        "heavy_modules": sorted(
+            name for name in HEAVY_MODULES
+            if any(module == name or module.startswith(name + '.') for module in modules)
+        ),
+    }
+
+
+def git_commit():
+    try:
+        completed = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True
+        )
+    except OSError:
+        return None
+
+    return completed.stdout.strip() if completed.returncode == 0 else None
+
+
+def make_baseline(results):
+    return {
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cases": results
+    }
+
+
+def compare_baselines(baseline, results, threshold=0.1):
+    regressions = []
+    metrics = [('mb_per_s', True), ('peak_rss', False), ('alloc_peak', False)]
+
+    print(f"\nСравнение с базовой линией {baseline.get('commit') or ''} ({baseline.get('created', '')}):")
+
+    for name, result in results.items():
+        old_result = baseline['cases'].get(name)
+        if old_result is None:
+            continue
+
+        for metric, higher_is_better in metrics:
+            old, new = old_result.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+
+            change = (new - old) / old
+            regressed = change < -threshold if higher_is_better else change > threshold
+            marker = '  РЕГРЕССИЯ' if regressed else ''
+
+            print(f"{name:<48} {metric:<10} {old:>14.1f} -> {new:>14.1f} ({change:+.1%}){marker}")
+
+            if regressed:
+                regressions.append((name, metric, change))
+
+    return regressions
+
+
+def bench_suite(args):
+    cases = suite_cases(int(args.max_size_mb * MB), charts=not args.no_charts)
+    if args.filter:
+        cases = [case for case in cases if args.filter in case[0]]
+
+    results = run_suite(cases, trace=not args.no_trace, min_seconds=args.min_seconds)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(make_baseline(results), f, ensure_ascii=False, indent=2)
+        print(f"Базовая линия сохранена: {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        regressions = compare_baselines(baseline, results, args.threshold)
+        if regressions:
+            print(f"Найдено регрессий: {len(regressions)}")
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки анализатора, извлечения CSS и отчетов')
+    parser.add_argument('case', nargs='?', default='single-line', choices=['single-line', 'multi-line', 'pipeline', 'suite', 'modes', 'startup'])
+    parser.add_argument('--size-mb', type=float, default=5)
+    parser.add_argument('--files', type=int, default=32)
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--max-seconds', type=float, default=5.0)
+    parser.add_argument('--max-size-mb', type=float, default=50, help='Максимальный размер CSS в наборе')
+    parser.add_argument('--filter', help='Запускать только сценарии, содержащие эту строку')
+    parser.add_argument('--min-seconds', type=float, default=MIN_CASE_SECONDS)
+    parser.add_argument('--no-trace', action='store_true', help='Не измерять аллокации через tracemalloc')
+    parser.add_argument('--no-charts', action='store_true', help='Пропустить генерацию графиков')
+    parser.add_argument('--save', help='Сохранить результаты как базовую линию (JSON)')
+    parser.add_argument('--compare', help='Сравнить с сохраненной базовой линией (JSON)')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Допустимое ухудшение метрик')
+    parser.add_argument('--max-ms', type=float, default=STARTUP_BUDGET_MS, help='Бюджет времени импорта для startup')
+    args = parser.parse_args()
+
+    if args.case == 'suite':
+        bench_suite(args)
+        return
+
+    if args.case == 'modes':
+        slower = []
+
+        for result in bench_modes(int(args.size_mb * MB)):
+            ratio = result['tokens'] / result['regex'] if result['regex'] else 0
+            print(f"{result['name']:<16} {result['bytes'] / MB:.1f} MB: regex {result['regex']:.1f} MB/s, "
+                  f"tokens {result['tokens']:.1f} MB/s (x{ratio:.2f})")
+
+            if ratio < 1 - args.threshold:
+                slower.append(result['name'])
+
+        if slower:
+            print(f"Режим tokens медленнее regex: {', '.join(slower)}")
+            sys.exit(1)
+        return
+
+    if args.case == 'startup':
+        result = bench_startup()
+        print(f"{result['name']}: импорт {result['import_ms']:.1f} мс, весь запуск {result['seconds'] * 1000:.1f} мс")
+
+        if result['heavy_modules']:
+            print(f"Лишние импорты: {', '.join(result['heavy_modules'])}")
+            sys.exit(1)
+
+        if result['import_ms'] > args.max_ms:
+            print(f"Превышен бюджет импорта: {result['import_ms']:.1f} мс > {args.max_ms} мс")
+            sys.exit(1)
+        return
+
+    if args.case == 'pipeline':
+        for result in bench_pipeline_scaling(args.files, int(args.size_mb * MB), args.max_workers):
+            print(f"{result['name']}: {result['bytes'] / MB:.1f} MB, "
+                  f"{result['seconds']:.3f} с ({result['mb_per_s']:.1f} MB/s)")
+        return
+
+    bench = bench_multi_line_bundle if args.case == 'multi-line' else bench_single_line_bundle
+    result = bench(int(args.size_mb * MB))
+
+    print(f"{result['name']}: {result['bytes'] / MB:.1f} MB, {result['lines']} строк, {result['hits']} совпадений, "
+          f"{result['seconds']:.3f} с ({result['mb_per_s']:.1f} MB/s)")
+
+    if result['seconds'] > args.max_seconds:
+        print(f"Превышен бюджет времени: {result['seconds']:.3f} с > {args.max_seconds} с")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
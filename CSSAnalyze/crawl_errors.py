@@ -0,0 +1,154 @@
+import re
+
+ERROR_CODES = {
+    "dns_failed": "имя хоста не найдено",
+    "connect_timeout": "нет TCP-соединения за отведенное время",
+    "connection_refused": "хост отклонил соединение",
+    "connection_closed": "соединение закрыто сервером",
+    "connection_reset": "соединение сброшено",
+    "network_error": "сеть недоступна",
+    "read_timeout": "сервер не ответил за отведенное время",
+    "tls_error": "ошибка TLS/сертификата",
+    "server_error": "сервер вернул 5xx или 429",
+    "http_error": "сервер вернул ошибку HTTP",
+    "page_timeout": "страница не загрузилась за отведенное время",
+    "site_timeout": "сайт не уложился в SITE_DEADLINE",
+    "stylesheet_timeout": "CSS-файл не загрузился за STYLESHEET_DEADLINE",
+    "too_large": "CSS-файл больше MAX_STYLESHEET_BYTES",
+    "bad_charset": "неизвестная кодировка CSS-файла",
+    "host_unavailable": "хост отключен после серии ошибок (circuit breaker)",
+    "browser_error": "ошибка браузера при загрузке страницы",
+    "crawl_failed": "краулер не вернул страницу",
+    "page_not_found": "страница не найдена в корпусе",
+    "missing_result": "нет результата в журнале",
+    "internal_error": "внутренняя ошибка анализа",
+}
+
+# Worth another attempt: the host answered or may answer soon, unlike a missing name or a bad certificate
+TRANSIENT_CODES = frozenset({
+    "connect_timeout", "connection_closed", "connection_reset", "network_error", "read_timeout", "server_error",
+})
+# Failures that say nothing about the host itself (a 404, a bug here) do not count towards its circuit breaker,
+# nor does a read timeout: one slow stylesheet on a shared CDN must not cut off every site that uses the CDN
+HOST_FAILURE_CODES = (
+    TRANSIENT_CODES - {"server_error", "read_timeout"} | {"dns_failed", "connection_refused", "page_timeout"}
+)
+
+BROWSER_ERRORS = {
+    "ERR_NAME_NOT_RESOLVED": "dns_failed",
+    "ERR_NAME_RESOLUTION_FAILED": "dns_failed",
+    "ERR_CONNECTION_TIMED_OUT": "connect_timeout",
+    "ERR_TIMED_OUT": "connect_timeout",
+    "ERR_CONNECTION_REFUSED": "connection_refused",
+    "ERR_CONNECTION_CLOSED": "connection_closed",
+    "ERR_EMPTY_RESPONSE": "connection_closed",
+    "ERR_CONNECTION_RESET": "connection_reset",
+    "ERR_CONNECTION_ABORTED": "connection_reset",
+    "ERR_ADDRESS_UNREACHABLE": "network_error",
+    "ERR_INTERNET_DISCONNECTED": "network_error",
+    "ERR_NETWORK_CHANGED": "network_error",
+}
+
+# httpx exceptions by class name, so this module does not import httpx
+HTTPX_ERRORS = {
+    "ConnectTimeout": "connect_timeout",
+    "ReadTimeout": "read_timeout",
+    "WriteTimeout": "read_timeout",
+    "PoolTimeout": "read_timeout",
+    "RemoteProtocolError": "connection_closed",
+    "ReadError": "connection_reset",
+    "WriteError": "connection_reset",
+}
+
+BROWSER_ERROR = re.compile(r'net::(ERR_[A-Z0-9_]+)')
+PAGE_TIMEOUT = re.compile(r'Timeout \d+ms exceeded')
+MESSAGE_CHARS = 300
+
+
+class CrawlError(Exception):
+    def __init__(self, code, message=''):
+        super().__init__(message or ERROR_CODES.get(code, code))
+        self.code = code
+
+
+def is_transient(code):
+    return code in TRANSIENT_CODES
+
+
+def is_host_failure(code):
+    return code in HOST_FAILURE_CODES
+
+
+def describe_error(code):
+    """A code with its description; free-text errors of older runs are cut to their first meaningful line."""
+    description = ERROR_CODES.get(code)
+    return f"{code} ({description})" if description else short_message(code)
+
+
+def short_message(message):
+    """The first meaningful line, without crawl4ai's code context and call log."""
+    browser_error = BROWSER_ERROR.search(message)
+    if browser_error:
+        line = next(line for line in message.splitlines() if browser_error.group(0) in line)
+    else:
+        line = next((line for line in message.splitlines() if line.strip()), '')
+
+    return line.strip()[:MESSAGE_CHARS]
+
+
+def classify_message(message):
+    """Error code of a failed page load from the crawler's error message."""
+    message = message or ''
+    browser_error = BROWSER_ERROR.search(message)
+
+    if browser_error:
+        name = browser_error.group(1)
+        if name.startswith(('ERR_SSL_', 'ERR_CERT_')):
+            return "tls_error"
+        return BROWSER_ERRORS.get(name, "browser_error")
+
+    if PAGE_TIMEOUT.search(message):
+        return "page_timeout"
+
+    return "crawl_failed"
+
+
+def classify_exception(error):
+    """Error code of an exception from the preflight, httpx or the crawler; unknown ones are internal errors."""
+    import asyncio
+    import socket
+    import ssl
+
+    if type(error).__name__ in HTTPX_ERRORS:
+        return HTTPX_ERRORS[type(error).__name__]
+
+    # httpx.ConnectError wraps the socket error, which says more than the wrapper
+    cause = error
+    while cause is not None:
+        if isinstance(cause, CrawlError):
+            return cause.code
+        if isinstance(cause, socket.gaierror):
+            return "dns_failed"
+        if isinstance(cause, ssl.SSLError):
+            return "tls_error"
+        if isinstance(cause, (TimeoutError, asyncio.TimeoutError)):
+            return "connect_timeout"
+        if isinstance(cause, ConnectionRefusedError):
+            return "connection_refused"
+        if isinstance(cause, ConnectionResetError):
+            return "connection_reset"
+        if isinstance(cause, (ConnectionAbortedError, BrokenPipeError)):
+            return "connection_closed"
+        cause = cause.__cause__ or cause.__context__
+
+    if isinstance(error, OSError) or type(error).__name__ == 'ConnectError':
+        return "network_error"
+    if 'net::' in str(error):
+        return classify_message(str(error))
+
+    return "internal_error"
+
+
+def error_fields(code, message=''):
+    """The `error` and `error_message` fields of a site result."""
+    return {"error": code, "error_message": short_message(message) if message else ERROR_CODES.get(code, '')}
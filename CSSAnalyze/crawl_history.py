@@ -0,0 +1,393 @@
+import argparse
+import bisect
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import CSS_FEATURES, HISTORY_DIR
+
+RUN_FORMAT = '%Y%m%dT%H%M%SZ'
+KEY_SEPARATOR = '\x1f'
+
+
+def run_id(when=None):
+    return datetime.fromtimestamp(time.time() if when is None else when, timezone.utc).strftime(RUN_FORMAT)
+
+
+def parse_run_time(value):
+    """Run id or ISO date/time (UTC when no zone is given) as a run-id-shaped string for bisecting."""
+    try:
+        return datetime.strptime(value, RUN_FORMAT).strftime(RUN_FORMAT)
+    except ValueError:
+        pass
+
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+
+    return moment.astimezone(timezone.utc).strftime(RUN_FORMAT)
+
+
+def snapshot_columns(sites):
+    """Per-site columns of a run: keys, fingerprints, failures and a site x feature occurrence matrix."""
+    features = list(CSS_FEATURES)
+    columns = {name: [] for name in ('categories', 'sites', 'urls', 'fingerprints', 'failed')}
+    counts = []
+
+    for cat_name, site_name, result in sites:
+        summary = result.get('features_summary', {})
+
+        columns['categories'].append(cat_name)
+        columns['sites'].append(site_name)
+        columns['urls'].append(result.get('url', ''))
+        columns['fingerprints'].append(result.get('fingerprint') or '')
+        columns['failed'].append(bool(result.get('error')))
+        counts.append([summary[feature_key]['total_occurrences'] if feature_key in summary else 0
+                       for feature_key in features])
+
+    snapshot = {name: np.array(values, dtype=str) for name, values in columns.items() if name != 'failed'}
+    snapshot['failed'] = np.array(columns['failed'], dtype=bool)
+    snapshot['features'] = np.array(features, dtype=str)
+    snapshot['counts'] = np.array(counts, dtype=np.int64).reshape(len(counts), len(features))
+    return snapshot
+
+
+def site_keys(snapshot):
+    return np.char.add(np.char.add(snapshot['categories'], KEY_SEPARATOR), snapshot['sites'])
+
+
+class CrawlHistory:
+    """Runs stored by UTC start time: <run>.npz with per-site columns and <run>.jsonl.gz with full results."""
+
+    def __init__(self, path=HISTORY_DIR):
+        self.path = str(path)
+        os.makedirs(self.path, exist_ok=True)
+
+        # The .npz is written last, so only complete runs are listed
+        self.runs = sorted(name[:-4] for name in os.listdir(self.path) if name.endswith('.npz'))
+
+    def record(self, sites, when=None):
+        run = run_id(when)
+        while run in self.runs:
+            when = (time.time() if when is None else when) + 1
+            run = run_id(when)
+
+        results_path = self._results_path(run)
+        offsets = []
+
+        # Results are written as they are read, so only the per-site columns stay in memory
+        with open(results_path + '.tmp', 'wb') as f:
+            snapshot = snapshot_columns(self._write_results(f, sites, offsets))
+
+        snapshot['offsets'] = np.array(offsets, dtype=np.int64)
+
+        os.replace(results_path + '.tmp', results_path)
+
+        self.save_snapshot(run, snapshot)
+        return run
+
+    def save_snapshot(self, run, snapshot):
+        snapshot_path = self._snapshot_path(run)
+
+        with open(snapshot_path + '.tmp', 'wb') as f:
+            np.savez_compressed(f, **snapshot)
+
+        os.replace(snapshot_path + '.tmp', snapshot_path)
+        bisect.insort(self.runs, run)
+
+    def run_at(self, value):
+        """Latest run started at or before a run id or ISO date/time."""
+        index = bisect.bisect_right(self.runs, parse_run_time(value))
+        if not index:
+            raise ValueError(f"Нет запусков до {value}")
+
+        return self.runs[index - 1]
+
+    def resolve(self, value):
+        return value if value in self.runs else self.run_at(value)
+
+    def load(self, run):
+        with np.load(self._snapshot_path(run)) as data:
+            return {name: data[name] for name in data.files}
+
+    def iter_results(self, run):
+        with gzip.open(self._results_path(run), 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                yield record['category'], record['site'], record['result']
+
+    def latest_results(self):
+        """Successful results of the last run by site URL, read one by one when asked for; None without runs."""
+        return RunResults(self, self.runs[-1]) if self.runs else None
+
+    def diff(self, old_run, new_run):
+        return snapshot_delta(self.load(old_run), self.load(new_run), old_run, new_run)
+
+    def changes(self, runs=None):
+        """Delta of every run against the one before it; each snapshot is read once."""
+        runs = self.runs if runs is None else runs
+        deltas = []
+        previous = None
+
+        for run in runs:
+            snapshot = self.load(run)
+            if previous is not None:
+                deltas.append(snapshot_delta(previous[1], snapshot, previous[0], run))
+            previous = (run, snapshot)
+
+        return deltas
+
+    @staticmethod
+    def _write_results(f, sites, offsets):
+        # One gzip member per site: the file still reads as a single stream, and a site can be read at its offset
+        for cat_name, site_name, result in sites:
+            line = json.dumps({"category": cat_name, "site": site_name, "result": result}, ensure_ascii=False)
+            offsets.append(f.tell())
+            f.write(gzip.compress((line + '\n').encode('utf-8')))
+            yield cat_name, site_name, result
+
+    def _snapshot_path(self, run):
+        return os.path.join(self.path, f"{run}.npz")
+
+    def _results_path(self, run):
+        return os.path.join(self.path, f"{run}.jsonl.gz")
+
+
+class RunResults:
+    """Successful results of one run by site URL. Fingerprints come from the snapshot; a full result is
+    read from its own gzip member only when the crawler reuses it."""
+
+    def __init__(self, history, run):
+        snapshot = history.load(run)
+        usable = ~snapshot['failed'] & (snapshot['fingerprints'] != '')
+
+        self.history = history
+        self.run = run
+        self.offsets = snapshot.get('offsets')
+        self.fingerprints = {}
+        self.rows = {}
+        self.results = None
+
+        for row in np.flatnonzero(usable).tolist():
+            url = str(snapshot['urls'][row])
+            self.fingerprints[url] = str(snapshot['fingerprints'][row])
+            self.rows[url] = row
+
+    def fingerprint(self, url):
+        return self.fingerprints.get(url)
+
+    def get(self, url):
+        row = self.rows.get(url)
+        if row is None:
+            return None
+
+        if self.offsets is None:
+            # Runs recorded before offsets were stored are one gzip stream, read whole once
+            if self.results is None:
+                self.results = {result['url']: result for _, _, result in self.history.iter_results(self.run)}
+            return self.results.get(url)
+
+        with open(self.history._results_path(self.run), 'rb') as f:
+            f.seek(int(self.offsets[row]))
+            with gzip.GzipFile(fileobj=f) as member:
+                return json.loads(member.readline())['result']
+
+
+def snapshot_delta(old, new, old_run=None, new_run=None):
+    old_keys, new_keys = site_keys(old), site_keys(new)
+    _, old_rows, new_rows = np.intersect1d(old_keys, new_keys, assume_unique=True, return_indices=True)
+
+    # Feature lists may differ between runs; compare the features of the new run by name
+    features = [str(feature_key) for feature_key in new['features']]
+    old_columns = {str(feature_key): i for i, feature_key in enumerate(old['features'])}
+    shared = np.array([feature_key in old_columns for feature_key in features], dtype=bool)
+
+    old_index = [old_columns[feature_key] for feature_key in features if feature_key in old_columns]
+
+    old_present = np.zeros((len(old_rows), len(features)), dtype=bool)
+    old_present[:, shared] = old['counts'][old_rows][:, old_index] > 0
+    new_present = new['counts'][new_rows] > 0
+
+    both_valid = ~old['failed'][old_rows] & ~new['failed'][new_rows]
+    comparable = both_valid[:, None] & shared[None, :]
+    gained = new_present & ~old_present & comparable
+    lost = old_present & ~new_present & comparable
+
+    old_prints, new_prints = old['fingerprints'][old_rows], new['fingerprints'][new_rows]
+    unchanged = both_valid & (new_prints != '') & (old_prints == new_prints)
+
+    changed = np.flatnonzero(gained.any(axis=1) | lost.any(axis=1))
+    added = np.ones(len(new_keys), dtype=bool)
+    added[new_rows] = False
+    removed = np.ones(len(old_keys), dtype=bool)
+    removed[old_rows] = False
+
+    return {
+        "from": old_run,
+        "to": new_run,
+        "compared_sites": int(both_valid.sum()),
+        "unchanged_fingerprints": int(unchanged.sum()),
+        "changed_sites": len(changed),
+        "added_sites": [str(key).replace(KEY_SEPARATOR, '/') for key in new_keys[added]],
+        "removed_sites": [str(key).replace(KEY_SEPARATOR, '/') for key in old_keys[removed]],
+        "features": features,
+        "feature_gained": gained.sum(axis=0),
+        "feature_lost": lost.sum(axis=0),
+        # Per-site lists are built only when a report asks for them
+        "categories": new['categories'][new_rows[changed]],
+        "sites": new['sites'][new_rows[changed]],
+        "gained": gained[changed],
+        "lost": lost[changed],
+    }
+
+
+def delta_sites(delta):
+    features = delta['features']
+
+    for category, site, gained, lost in zip(delta['categories'], delta['sites'], delta['gained'], delta['lost']):
+        yield (str(category), str(site),
+               [features[i] for i in np.flatnonzero(gained)],
+               [features[i] for i in np.flatnonzero(lost)])
+
+
+def record_run(sites, delta_path=None, path=HISTORY_DIR):
+    """Stores a finished run and, if there is an earlier one, writes the delta against it."""
+    history = CrawlHistory(path)
+    run = history.record(sites)
+    position = history.runs.index(run)
+
+    if not position:
+        return run, None
+
+    delta = history.diff(history.runs[position - 1], run)
+
+    if delta_path:
+        with open(delta_path, 'w', encoding='utf-8') as f:
+            f.write(format_delta(delta))
+
+    return run, delta
+
+
+def format_recorded(run, delta, delta_path=None):
+    line = f"Запуск {run} сохранен в истории"
+
+    if delta is None:
+        return line
+
+    return (f"{line}\nИзменения с {delta['from']}: {delta['changed_sites']} сайтов, "
+            f"+{int(delta['feature_gained'].sum())} / -{int(delta['feature_lost'].sum())} возможностей"
+            + (f" ({delta_path})" if delta_path else ""))
+
+
+def feature_label(feature_key):
+    return CSS_FEATURES[feature_key]['name'] if feature_key in CSS_FEATURES else feature_key
+
+
+def format_delta(delta):
+    lines = []
+    lines.append("=" * 80)
+    lines.append(f"ИЗМЕНЕНИЯ: {delta['from']} -> {delta['to']}")
+    lines.append("=" * 80)
+    lines.append(f"Сравнено сайтов (без ошибок в обоих запусках): {delta['compared_sites']}")
+    lines.append(f"С неизменным набором CSS: {delta['unchanged_fingerprints']}")
+
+    if delta['added_sites']:
+        lines.append(f"Новые сайты: {', '.join(delta['added_sites'])}")
+    if delta['removed_sites']:
+        lines.append(f"Убранные сайты: {', '.join(delta['removed_sites'])}")
+
+    lines.append("")
+    lines.append("ПО ВОЗМОЖНОСТЯМ")
+    lines.append("-" * 80)
+
+    for i, feature_key in enumerate(delta['features']):
+        gained, lost = int(delta['feature_gained'][i]), int(delta['feature_lost'][i])
+        if gained or lost:
+            lines.append(f"{feature_label(feature_key)}: +{gained} / -{lost} сайтов")
+
+    lines.append("")
+    lines.append("ПО САЙТАМ")
+    lines.append("-" * 80)
+
+    if not delta['changed_sites']:
+        lines.append("Изменений нет")
+
+    for category, site, gained, lost in delta_sites(delta):
+        lines.append(f"{site} ({category})")
+        if gained:
+            lines.append(f"   Появились: {', '.join(map(feature_label, gained))}")
+        if lost:
+            lines.append(f"   Пропали: {', '.join(map(feature_label, lost))}")
+
+    return "\n".join(lines)
+
+
+def format_runs(history):
+    lines = [f"{'Запуск':<18} {'Сайтов':>7} {'Ошибок':>7} {'Изменились':>11} {'Появилось':>10} {'Пропало':>8}"]
+    previous = None
+
+    for run in history.runs:
+        snapshot = history.load(run)
+        delta = snapshot_delta(previous, snapshot) if previous is not None else None
+        previous = snapshot
+
+        changed, gained, lost = (
+            (delta['changed_sites'], int(delta['feature_gained'].sum()), int(delta['feature_lost'].sum()))
+            if delta else ('-', '-', '-')
+        )
+        lines.append(f"{run:<18} {len(snapshot['sites']):>7} {int(snapshot['failed'].sum()):>7} "
+                     f"{changed:>11} {gained:>10} {lost:>8}")
+
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='История запусков и изменения возможностей по сайтам')
+    parser.add_argument('--history', default=HISTORY_DIR, help='каталог истории запусков')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='запуски и число появившихся/пропавших возможностей')
+
+    diff = commands.add_parser('diff', help='изменения между двумя запусками (по умолчанию - двумя последними)')
+    diff.add_argument('old', nargs='?', help='запуск или дата/время ISO: берется последний запуск до нее')
+    diff.add_argument('new', nargs='?', help='запуск или дата/время ISO (по умолчанию - последний)')
+    diff.add_argument('--output', help='записать отчет в файл')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    history = CrawlHistory(args.history)
+
+    if args.command == 'list':
+        print(format_runs(history))
+        return
+
+    if not history.runs:
+        raise SystemExit("История запусков пуста")
+
+    new_run = history.resolve(args.new) if args.new else history.runs[-1]
+
+    if args.old:
+        old_run = history.resolve(args.old)
+    elif history.runs.index(new_run):
+        old_run = history.runs[history.runs.index(new_run) - 1]
+    else:
+        raise SystemExit(f"Нет запуска раньше {new_run}")
+
+    report = format_delta(history.diff(old_run, new_run))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
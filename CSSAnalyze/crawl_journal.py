@@ -0,0 +1,138 @@
+import json
+import os
+
+from crawl_errors import error_fields
+from site_summary import empty_site_results
+from results_file import write_json, write_sites, category_sizes
+from config import WEBSITES, CRAWL_JOURNAL
+
+
+class CrawlJournal:
+    def __init__(self, path=CRAWL_JOURNAL, resume=True):
+        self.path = str(path)
+        self.index = {}
+
+        if resume and os.path.exists(self.path):
+            self._load_index()
+
+        self.file = open(self.path, 'ab' if resume else 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def is_done(self, cat_name, site_name):
+        entry = self.index.get((cat_name, site_name))
+        return entry is not None and not entry[2]
+
+    def pending(self, websites=WEBSITES):
+        for cat_name, category_sites in websites.items():
+            for site_name, site_url in category_sites.items():
+                if not self.is_done(cat_name, site_name):
+                    yield cat_name, site_name, site_url
+
+    def append(self, cat_name, site_name, result):
+        line = json.dumps(
+            {"category": cat_name, "site": site_name, "result": result},
+            ensure_ascii=False
+        ).encode('utf-8') + b'\n'
+
+        self._write((cat_name, site_name), line, bool(result.get('error')))
+
+    def merge(self, path):
+        for _, line, record in self._records(path):
+            key = (record['category'], record['site'])
+            failed = bool(record['result'].get('error'))
+
+            # A failure in one partial file must not hide a success from another
+            if failed and self.is_done(*key):
+                continue
+
+            self._write(key, line, failed, sync=False)
+
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def result(self, cat_name, site_name):
+        self.file.flush()
+
+        with open(self.path, 'rb') as journal:
+            return self._read(journal, cat_name, site_name)
+
+    def export(self, path, websites=WEBSITES):
+        write_json(path, self.iter_results(websites), category_sizes(websites))
+
+    def export_sites(self, path, websites=WEBSITES):
+        return write_sites(path, self.iter_results(websites), websites)
+
+    def iter_results(self, websites=WEBSITES):
+        self.file.flush()
+
+        with open(self.path, 'rb') as journal:
+            for cat_name, category_sites in websites.items():
+                for site_name, site_url in category_sites.items():
+                    yield cat_name, site_name, self._read_or_missing(journal, cat_name, site_name, site_url)
+
+    def _read_or_missing(self, journal, cat_name, site_name, site_url):
+        result = self._read(journal, cat_name, site_name)
+
+        if result is None:
+            result = empty_site_results(site_name, site_url)
+            result.update(error_fields("missing_result"))
+
+        return result
+
+    def _read(self, journal, cat_name, site_name):
+        entry = self.index.get((cat_name, site_name))
+        if entry is None:
+            return None
+
+        offset, length, _ = entry
+        journal.seek(offset)
+        return json.loads(journal.read(length))['result']
+
+    def _write(self, key, line, failed, sync=True):
+        offset = self.file.tell()
+        self.file.write(line)
+
+        if sync:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+        self.index[key] = (offset, len(line), failed)
+
+    @staticmethod
+    def _records(path):
+        offset = 0
+
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    return
+
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return
+
+                yield offset, line, record
+                offset += len(line)
+
+    def _load_index(self):
+        valid_end = 0
+
+        for offset, line, record in self._records(self.path):
+            key = (record['category'], record['site'])
+            self.index[key] = (offset, len(line), bool(record['result'].get('error')))
+            valid_end = offset + len(line)
+
+        # Drop a record cut short by a crash so new records start on a clean line
+        if valid_end != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_end)
@@ -0,0 +1,67 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+from config import (
+    MAX_CONCURRENT_REQUESTS,
+    MAX_CONCURRENT_PER_HOST,
+    HOST_REQUESTS_PER_SECOND,
+    HOST_BURST,
+)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        waited = 0.0
+
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class CrawlScheduler:
+    def __init__(self, max_concurrency=MAX_CONCURRENT_REQUESTS, per_host=MAX_CONCURRENT_PER_HOST,
+                 rate=HOST_REQUESTS_PER_SECOND, burst=HOST_BURST):
+        self.global_limit = asyncio.Semaphore(max_concurrency)
+        self.per_host = per_host
+        self.rate = rate
+        self.burst = burst
+        self.host_limits = {}
+        self.host_buckets = {}
+
+    @staticmethod
+    def host_of(url):
+        return (urlsplit(url).hostname or '').lower()
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = self.host_of(url)
+
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.per_host)
+            self.host_buckets[host] = TokenBucket(self.rate, self.burst)
+
+        started = time.monotonic()
+
+        async with self.host_limits[host]:
+            await self.host_buckets[host].acquire()
+            async with self.global_limit:
+                yield time.monotonic() - started
@@ -0,0 +1,115 @@
+import argparse
+import hashlib
+import os
+
+from crawl_journal import CrawlJournal
+from report_generator import generate_summary_report
+from results_table import ResultsTable
+from usage_stats import UsageStats
+from config import (WEBSITES, OUTPUT_SITES, OUTPUT_JSON, OUTPUT_TXT, OUTPUT_TABLE, OUTPUT_DELTA, CRAWL_JOURNAL,
+                    MERGED_JOURNAL, CHART_FORMAT, CHART_DPI)
+
+
+def parse_shard(spec):
+    index, sep, count = spec.partition('/')
+
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        index = count = 0
+
+    if not sep or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Неверный шард: {spec} (ожидается i/N, 1 <= i <= N)")
+
+    return index, count
+
+
+def shard_of(url, count):
+    return int(hashlib.sha1(url.encode('utf-8')).hexdigest(), 16) % count + 1
+
+
+def shard_websites(websites, index, count):
+    return {
+        cat_name: {
+            site_name: site_url
+            for site_name, site_url in category_sites.items()
+            if shard_of(site_url, count) == index
+        }
+        for cat_name, category_sites in websites.items()
+    }
+
+
+def shard_journal_path(index, count, path=CRAWL_JOURNAL):
+    stem, ext = os.path.splitext(str(path))
+    return f"{stem}.shard-{index}-of-{count}{ext}"
+
+
+def merge_shards(paths, output=OUTPUT_SITES, websites=WEBSITES, journal_path=MERGED_JOURNAL, json_output=None):
+    # The merged journal is rewritten from scratch, so it must not be one of the files being merged
+    if os.path.realpath(journal_path) in {os.path.realpath(path) for path in paths}:
+        raise ValueError(f"Объединенный журнал {journal_path} совпадает с одним из журналов шардов")
+
+    with CrawlJournal(journal_path, resume=False) as journal:
+        for path in paths:
+            journal.merge(path)
+
+        journal.export_sites(output, websites)
+
+        if json_output:
+            journal.export(json_output, websites)
+
+        return [
+            (cat_name, site_name)
+            for cat_name, category_sites in websites.items()
+            for site_name in category_sites
+            if (cat_name, site_name) not in journal.index
+        ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Объединение частичных результатов шардов (--shard i/N)')
+    parser.add_argument('parts', nargs='+', help='журналы шардов (JSONL)')
+    parser.add_argument('--sites', default=OUTPUT_SITES, help='результаты по одному сайту на строку (.jsonl)')
+    parser.add_argument('--output', default=OUTPUT_JSON, help='результаты в прежнем формате одного JSON')
+    parser.add_argument('--no-json', action='store_true', help='не писать --output, только --sites')
+    parser.add_argument('--report', default=OUTPUT_TXT)
+    parser.add_argument('--table', default=OUTPUT_TABLE, help='колоночная таблица результатов (.npz)')
+    parser.add_argument('--journal', default=MERGED_JOURNAL,
+                        help='куда записать объединенный журнал (перезаписывается; журнал краулинга не трогается)')
+    parser.add_argument('--no-charts', action='store_true', help='не строить графики')
+    parser.add_argument('--no-history', action='store_true', help='не сохранять объединенный запуск в истории')
+    parser.add_argument('--delta', default=OUTPUT_DELTA, help='отчет об изменениях с прошлого запуска')
+    parser.add_argument('--chart-format', choices=['png', 'svg'], default=CHART_FORMAT)
+    parser.add_argument('--chart-dpi', type=int, default=CHART_DPI)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    missing = merge_shards(args.parts, args.sites, journal_path=args.journal,
+                           json_output=None if args.no_json else args.output)
+    if missing:
+        print(f"Нет результатов для {len(missing)} сайтов: "
+              f"{', '.join(site_name for _, site_name in missing[:10])}")
+
+    if not args.no_history:
+        from crawl_history import record_run, format_recorded
+
+        with CrawlJournal(args.journal) as journal:
+            print(format_recorded(*record_run(journal.iter_results(), args.delta), args.delta))
+
+    stats = UsageStats.save(ResultsTable.from_file(args.sites), args.table)
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        f.write(generate_summary_report(stats))
+
+    if not args.no_charts:
+        from visualizer import CSSVisualizationGenerator, format_chart_results
+        print(format_chart_results(
+            CSSVisualizationGenerator(args.table, args.chart_format, args.chart_dpi).generate_all()
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+
+def current_task_id():
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+
+    return id(task) if task is not None else 0
+
+
+class Tracer:
+    enabled = True
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events = []
+        self.totals = defaultdict(float)
+        self.threads = {}
+
+    @contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter()
+
+        try:
+            yield args
+        finally:
+            self.add(name, start, time.perf_counter(), **args)
+
+    def add(self, name, start, end, **args):
+        thread = self.threads.setdefault(current_task_id(), len(self.threads) + 1)
+        self.events.append((name, start, end, thread, args))
+
+    def count(self, name, seconds):
+        self.totals[name] += seconds
+
+    def summary(self):
+        stages = defaultdict(lambda: [0, 0.0, 0.0, 0])
+
+        for name, start, end, _, args in self.events:
+            stage = stages[name]
+            stage[0] += 1
+            stage[1] += end - start
+            stage[2] = max(stage[2], end - start)
+            stage[3] += args.get('bytes', 0)
+
+        lines = [f"{'Этап':<24} {'Кол-во':>7} {'Всего, с':>10} {'Среднее, мс':>12} {'Макс, мс':>10} {'Байт':>12}"]
+
+        for name, (count, total, longest, size) in sorted(stages.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<24} {count:>7} {total:>10.2f} {total / count * 1000:>12.1f} "
+                         f"{longest * 1000:>10.1f} {size:>12}")
+
+        if self.totals:
+            lines.append("")
+            lines.append(f"{'Время анализа по шаблонам':<60} {'Всего, с':>10}")
+
+            for name, total in sorted(self.totals.items(), key=lambda item: -item[1]):
+                lines.append(f"{name[:60]:<60} {total:>10.3f}")
+
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        pid = os.getpid()
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "traceEvents": [
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": (start - self.origin) * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": pid,
+                        "tid": thread,
+                        "args": args,
+                    }
+                    for name, start, end, thread, args in self.events
+                ],
+                "displayTimeUnit": "ms",
+            }, f, ensure_ascii=False)
+
+
+class NullTracer:
+    enabled = False
+
+    def span(self, name, **args):
+        return nullcontext({})
+
+    def add(self, name, start, end, **args):
+        pass
+
+    def count(self, name, seconds):
+        pass
+
+
+NULL_TRACER = NullTracer()
@@ -1,75 +1,345 @@
-import re
-from collections import defaultdict
-from config import CSS_FEATURES
+import time
+from bisect import bisect_left, bisect_right
+from config import (CSS_FEATURES, STREAM_CHUNK_SIZE, STREAM_OVERLAP, ANALYSIS_MODE, BATCH_CHARS,
+                    INSTANCE_SAMPLES)
+from feature_matcher import FeatureMatcher
+from css_tokenizer import CSSTokenizer
+from line_index import LineIndex
+from style_extractor import extract_styles
+
+
+CONTEXT_CHARS = 100
+# No feature pattern matches NUL, so matches stop at the edge of each joined input
+BATCH_SEPARATOR = '\x00'
+ANALYSIS_MODES = {
+    'regex': FeatureMatcher,
+    'tokens': CSSTokenizer,
+}
+_matchers = {}
+
+
+def match_instance(css_content, match_start, match_end, line_num):
+    start = max(0, match_start - CONTEXT_CHARS)
+    end = min(len(css_content), match_end + CONTEXT_CHARS)
+    context = css_content[start:end].strip()
+    
+    return {
+        "match": css_content[match_start:match_end],
+        "line": line_num,
+        "context": context[:CONTEXT_CHARS * 2]
+    }
+
+
+def sample_counts(matcher, spans, samples):
+    """How many leading spans of each pattern become instances: the first `samples` per feature."""
+    taken = [0] * len(spans)
+    
+    for pattern_indexes in matcher.feature_patterns.values():
+        left = samples
+        for i in pattern_indexes:
+            if left <= 0:
+                break
+            taken[i] = min(len(spans[i]), left)
+            left -= taken[i]
+    
+    return taken
+
+
+def build_features(matcher, counts, instances, samples=INSTANCE_SAMPLES):
+    features = {}
+    
+    for feature_key, feature_data in matcher.features.items():
+        pattern_indexes = matcher.feature_patterns[feature_key]
+        count = sum(counts[i] for i in pattern_indexes)
+        
+        if count:
+            found_instances = [instance for i in pattern_indexes for instance in instances[i]]
+            features[feature_key] = {
+                "name": feature_data['name'],
+                "count": count,
+                "instances": found_instances[:samples],
+                "description": feature_data['description']
+            }
+    
+    return features
+
+
+def shared_matcher(mode):
+    matcher = _matchers.get(mode)
+    
+    if matcher is None:
+        matcher = _matchers[mode] = ANALYSIS_MODES[mode](CSS_FEATURES)
+    
+    return matcher
 
 
 class CSSAnalyzer:
-    def __init__(self):
-        self.features_found = defaultdict(list)
+    def __init__(self, mode=ANALYSIS_MODE, timed=False, samples=INSTANCE_SAMPLES):
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Неизвестный режим анализа: {mode}")
+        
+        self.mode = mode
+        self.timed = timed
+        self.samples = samples
+        # Matchers keep no per-scan state, so every analyzer of a mode shares the compiled patterns
+        self.matcher = shared_matcher(mode)
     
     def analyze_css(self, css_content, source_url):
-        results = {
-            "source": source_url,
-            "total_lines": len(css_content.split('\n')),
-            "total_chars": len(css_content),
-            "features": {}
-        }
+        started = time.perf_counter() if self.timed else None
+        pattern_seconds = None
+        
+        if self.timed and hasattr(self.matcher, 'find_all_timed'):
+            spans, pattern_seconds = self.matcher.find_all_timed(css_content)
+        else:
+            spans = self.matcher.find_all(css_content)
+        
+        analysis = self._analysis(css_content, source_url, spans)
         
-        for feature_key, feature_data in CSS_FEATURES.items():
-            found_instances = []
+        if self.timed:
+            analysis['timings'] = self._timings(started, pattern_seconds)
+        
+        return analysis
+    
+    def analyze_batch(self, sources, batch_chars=BATCH_CHARS):
+        """analyze_css() results for (source, content) pairs, in order; inputs under batch_chars share one scan."""
+        batch = []
+        size = 0
+        
+        for source_url, css_content in sources:
+            if len(css_content) >= batch_chars:
+                yield from self._analyze_joined(batch)
+                batch, size = [], 0
+                yield self.analyze_css(css_content, source_url)
+                continue
             
-            for pattern in feature_data.get('patterns', []):
-                matches = re.finditer(pattern, css_content, re.IGNORECASE | re.MULTILINE)
+            batch.append((source_url, css_content))
+            size += len(css_content) + len(BATCH_SEPARATOR)
+            
+            if size >= batch_chars:
+                yield from self._analyze_joined(batch)
+                batch, size = [], 0
+        
+        yield from self._analyze_joined(batch)
+    
+    def _analyze_joined(self, batch):
+        if not batch:
+            return
+        
+        # The tokenizer carries comment and string state between tokens, so it cannot share a scan
+        if len(batch) == 1 or not getattr(self.matcher, 'batchable', False):
+            for source_url, css_content in batch:
+                yield self.analyze_css(css_content, source_url)
+            return
+        
+        started = time.perf_counter() if self.timed else None
+        text = BATCH_SEPARATOR.join(css_content for _, css_content in batch)
+        
+        starts = []
+        offset = 0
+        for _, css_content in batch:
+            starts.append(offset)
+            offset += len(css_content) + len(BATCH_SEPARATOR)
+        
+        # Most small inputs have no matches at all, so spans are only kept for those that do
+        source_spans = {}
+        rescan = set()
+        
+        for i, pattern_spans in enumerate(self.matcher.find_all(text)):
+            match_starts = pattern_spans.starts
+            j = 0
+            
+            # Spans of one pattern are sorted and disjoint, so each source takes a slice of them
+            while j < len(pattern_spans):
+                k = bisect_right(starts, match_starts[j]) - 1
+                source_end = starts[k] + len(batch[k][1])
+                
+                # A match starting on the separator itself still counts as running past the source
+                last = max(bisect_left(match_starts, source_end, j), j + 1)
+                
+                # A match running past its source also hides matches at the start of the next ones
+                if pattern_spans[last - 1][1] > source_end:
+                    rescan.update(range(k, bisect_right(starts, pattern_spans[last - 1][1])))
                 
-                for match in matches:
-                    start = max(0, match.start() - 100)
-                    end = min(len(css_content), match.end() + 100)
-                    context = css_content[start:end].strip()
-                    
-                    line_num = css_content[:match.start()].count('\n') + 1
-                    
-                    found_instances.append({
-                        "match": match.group(0),
-                        "line": line_num,
-                        "context": context[:200]
-                    })
+                spans = source_spans.get(k)
+                if spans is None:
+                    spans = source_spans[k] = [() for _ in self.matcher.patterns]
+                
+                spans[i] = pattern_spans[j:last]
+                j = last
+        
+        seconds = time.perf_counter() - started if self.timed else None
+        
+        for k, (source_url, css_content) in enumerate(batch):
+            if k in rescan:
+                yield self.analyze_css(css_content, source_url)
+                continue
+            
+            analysis = self._analysis(css_content, source_url, source_spans.get(k), starts[k])
+            
+            if self.timed:
+                # One scan covers the whole batch; each source gets its share by size
+                analysis['timings'] = {"analysis_seconds": seconds * (len(css_content) + 1) / (offset or 1)}
             
-            if found_instances:
-                results['features'][feature_key] = {
-                    "name": feature_data['name'],
-                    "count": len(found_instances),
-                    "instances": found_instances[:5],
-                    "description": feature_data['description']
-                }
+            yield analysis
+    
+    def _analysis(self, css_content, source_url, spans, base=0):
+        if spans is None:
+            return {
+                "source": source_url,
+                "total_lines": css_content.count('\n') + 1,
+                "total_chars": len(css_content),
+                "features": {}
+            }
+        
+        line_index = LineIndex(css_content)
+        
+        # Only the sampled matches get a line and context; the rest are just counted
+        instances = [
+            [
+                match_instance(css_content, match_start - base, match_end - base,
+                               line_index.line_of(match_start - base))
+                for match_start, match_end in pattern_spans[:taken]
+            ]
+            for pattern_spans, taken in zip(spans, sample_counts(self.matcher, spans, self.samples))
+        ]
+        counts = [len(pattern_spans) for pattern_spans in spans]
         
-        return results
+        return {
+            "source": source_url,
+            "total_lines": line_index.total_lines,
+            "total_chars": len(css_content),
+            "features": build_features(self.matcher, counts, instances, self.samples)
+        }
     
-    def extract_inline_styles(self, html):
-        inline_css = []
+    def _timings(self, started, pattern_seconds=None):
+        timings = {"analysis_seconds": time.perf_counter() - started}
+        
+        if pattern_seconds is not None:
+            timings['patterns'] = {
+                compiled.pattern: seconds
+                for (_, compiled), seconds in zip(self.matcher.patterns, pattern_seconds)
+                if seconds
+            }
+        
+        return timings
+    
+    def profile_patterns(self, sources, fuzz=True):
+        """Cost of every pattern over (source, text) pairs; with fuzz also their worst-case growth."""
+        from pattern_profiler import PatternProfiler
         
-        style_pattern = r'<style[^>]*>(.*?)</style>'
-        matches = re.finditer(style_pattern, html, re.DOTALL | re.IGNORECASE)
+        if self.mode != 'regex':
+            raise ValueError(f"Профилирование шаблонов доступно только в режиме regex, а не {self.mode}")
         
-        for match in matches:
-            inline_css.append(match.group(1))
+        profiler = PatternProfiler(self.matcher.features)
+        profile = {"patterns": profiler.profile(sources)}
         
-        return '\n'.join(inline_css)
+        if fuzz:
+            profile['fuzz'] = profiler.fuzz()
+        
+        return profile
+    
+    def stream(self, source_url):
+        return CSSStreamAnalyzer(self.matcher, source_url, samples=self.samples)
+    
+    def analyze_css_stream(self, chunks, source_url):
+        started = time.perf_counter() if self.timed else None
+        stream = self.stream(source_url)
+        
+        for chunk in chunks:
+            stream.feed(chunk)
+        
+        analysis = stream.close()
+        
+        if self.timed:
+            analysis['timings'] = self._timings(started)
+        
+        return analysis
+    
+    def analyze_css_file(self, path, source_url, chunk_size=STREAM_CHUNK_SIZE):
+        with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            return self.analyze_css_stream(iter(lambda: f.read(chunk_size), ''), source_url)
+    
+    def extract_styles(self, html, base_url):
+        """Inline CSS and stylesheet URLs (links and inline @import) from one pass over the HTML."""
+        inline_styles, css_links = extract_styles(html, base_url)
+        return '\n'.join(inline_styles), css_links
+    
+    def iter_inline_styles(self, html):
+        yield from extract_styles(html, '')[0]
+    
+    def extract_inline_styles(self, html):
+        return '\n'.join(self.iter_inline_styles(html))
     
     def extract_css_links(self, html, base_url):
-        from urllib.parse import urljoin
+        return extract_styles(html, base_url)[1]
+
+
+class CSSStreamAnalyzer:
+    def __init__(self, matcher, source_url, overlap=STREAM_OVERLAP, samples=INSTANCE_SAMPLES):
+        self.matcher = matcher
+        self.samples = samples
+        self.source_url = source_url
+        self.overlap = max(overlap, CONTEXT_CHARS)
+        self.buffer = ''
+        self.base = 0
+        self.base_line = 1
+        self.scan_from = 0
+        self.total_chars = 0
+        self.newlines = 0
+        self.last_end = [0] * len(matcher.patterns)
+        self.counts = [0] * len(matcher.patterns)
+        self.instances = [[] for _ in matcher.patterns]
+    
+    def feed(self, chunk):
+        if not chunk:
+            return
         
-        css_links = []
+        self.total_chars += len(chunk)
+        self.newlines += chunk.count('\n')
+        self.buffer += chunk
         
-        link_pattern = r'<link[^>]*rel=["\']stylesheet["\'][^>]*>'
-        matches = re.finditer(link_pattern, html, re.IGNORECASE)
+        limit = self.base + len(self.buffer) - self.overlap
+        if limit > self.scan_from:
+            self._scan(limit, final=False)
+    
+    def close(self):
+        self._scan(self.base + len(self.buffer), final=True)
+        self.buffer = ''
         
-        for match in matches:
-            link_tag = match.group(0)
+        return {
+            "source": self.source_url,
+            "total_lines": self.newlines + 1,
+            "total_chars": self.total_chars,
+            "features": build_features(self.matcher, self.counts, self.instances, self.samples)
+        }
+    
+    def _scan(self, limit, final):
+        text = self.buffer
+        last_end = [end - self.base for end in self.last_end]
+        spans = self.matcher.scan(text, self.scan_from - self.base, limit - self.base, last_end)
+        
+        # A match that reaches into the unread tail may still grow, so wait for more data
+        if not final and any(
+            max(pattern_spans.ends) + CONTEXT_CHARS > len(text) for pattern_spans in spans if pattern_spans
+        ):
+            return
+        
+        line_index = LineIndex(text)
+        
+        for i, pattern_spans in enumerate(spans):
+            self.counts[i] += len(pattern_spans)
             
-            href_match = re.search(r'href=["\']([^"\']+)["\']', link_tag)
-            if href_match:
-                href = href_match.group(1)
-                absolute_url = urljoin(base_url, href)
-                css_links.append(absolute_url)
+            for match_start, match_end in pattern_spans[:max(0, self.samples - len(self.instances[i]))]:
+                line_num = self.base_line - 1 + line_index.line_of(match_start)
+                self.instances[i].append(match_instance(text, match_start, match_end, line_num))
+        
+        resume = self.matcher.resume_offset(limit - self.base, last_end)
+        self.last_end = [end + self.base for end in last_end]
+        self.scan_from = resume + self.base
         
-        return css_links
+        # A tokenizer match starts at the identifier before the "(" or ":" that found it, so it may begin
+        # a little before `resume`: keep the overlap behind it too, plus the context of such a match
+        cut = max(0, resume - self.overlap - CONTEXT_CHARS)
+        self.base_line += text.count('\n', 0, cut)
+        self.buffer = text[cut:]
+        self.base += cut
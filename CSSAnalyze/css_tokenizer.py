@@ -0,0 +1,177 @@
+import re
+from config import CSS_FEATURES
+from match_spans import MatchSpans
+
+
+class CSSTokenizer:
+    FLAGS = re.IGNORECASE
+    KINDS = ('at_rules', 'functions', 'pseudo_classes', 'properties', 'nesting')
+    WHITESPACE = ' \t\r\n\f'
+
+    def __init__(self, features=None):
+        self.features = CSS_FEATURES if features is None else features
+        self.patterns = []
+        self.feature_patterns = {}
+        self._rules = {}
+
+        for feature_key, feature_data in self.features.items():
+            indexes = []
+            tokens = feature_data.get('tokens', {})
+
+            for kind in self.KINDS:
+                spec = tokens.get(kind)
+                if not spec:
+                    continue
+
+                if kind == 'nesting':
+                    spec = ['&']
+
+                for name in spec:
+                    value = spec[name] if isinstance(spec, dict) else None
+                    if value:
+                        value = re.compile(r'\s*' + re.escape(value) + r'(?![\w-])', self.FLAGS)
+
+                    indexes.append(len(self.patterns))
+                    self._rules.setdefault((kind, name.lower()), []).append(len(self.patterns))
+                    self.patterns.append((feature_key, kind, name.lower(), value))
+
+            self.feature_patterns[feature_key] = indexes
+
+        self._token_re = self._master_pattern()
+
+    def find_all(self, text):
+        return self.scan(text, 0, len(text), [0] * len(self.patterns))
+
+    def scan(self, text, start, limit, last_end):
+        spans = [MatchSpans() for _ in self.patterns]
+        if not self.patterns:
+            return spans
+
+        # Every rule shares one resume offset: the end of the last consumed token,
+        # so a comment or string that crosses `limit` is not rescanned as code.
+        # Text past `limit` is lookahead, so a comment, string or url() still open
+        # at its end may continue in the next chunk: the scan stops at its start
+        position = max(start, max(last_end))
+        search = self._token_re.search
+        kinds = self.KINDS
+        more = limit < len(text)
+
+        while position < limit:
+            match = search(text, position)
+            if match is None or match.start() >= limit:
+                position = limit
+                break
+
+            kind = match.lastgroup
+            end = match.end()
+
+            if kind == 'comment':
+                close = text.find('*/', end)
+                if close == -1 and more:
+                    position = match.start()
+                    break
+                end = len(text) if close == -1 else close + 2
+            elif kind in kinds:
+                self._classify(text, match, kind, spans)
+            elif more and self._open_at_end(text, match, kind):
+                position = match.start()
+                break
+
+            position = end
+
+        last_end[:] = [position] * len(last_end)
+
+        return spans
+
+    @staticmethod
+    def resume_offset(limit, last_end):
+        """Where the next streaming scan starts: `limit`, or the start of a token left open at the end of the text."""
+        return min(limit, max(last_end, default=limit))
+
+    @staticmethod
+    def _open_at_end(text, match, kind):
+        end = match.end()
+
+        if kind == 'url':
+            return end == len(text) and text[end - 1] != ')'
+
+        # A string ends at an unescaped quote or at a newline; a trailing backslash may still escape what follows
+        start = match.start()
+        body = text[start + 1:end - 1]
+        escaped = (len(body) - len(body.rstrip('\\'))) % 2 == 1
+        closed = end - start > 1 and text[end - 1] == text[start] and not escaped
+        return not closed and (end == len(text) or text[end] == '\\')
+
+    def _classify(self, text, match, kind, spans):
+        start, end = match.span()
+
+        if kind == 'functions' or kind == 'properties':
+            start = self._ident_start(text, start)
+            name = text[start:match.start()]
+
+            if kind == 'properties' and not self._in_declaration(text, start):
+                return
+        elif kind == 'nesting':
+            name = '&'
+        else:
+            name = match.group(kind)
+
+        for i in self._rules.get((kind, name.lower()), ()):
+            value = self.patterns[i][3]
+
+            if value is None:
+                spans[i].append(start, end)
+                continue
+
+            value_match = value.match(text, end)
+            if value_match:
+                spans[i].append(start, value_match.end())
+
+    @staticmethod
+    def _ident_start(text, position):
+        while position > 0 and (text[position - 1].isalnum() or text[position - 1] in '-_'):
+            position -= 1
+
+        return position
+
+    def _in_declaration(self, text, position):
+        i = position - 1
+        while i >= 0 and text[i] in self.WHITESPACE:
+            i -= 1
+
+        if i < 0 or text[i] in '{;':
+            return True
+
+        return text[i] == '/' and i > 0 and text[i - 1] == '*'
+
+    def _master_pattern(self):
+        names = {kind: sorted({name for k, name in self._rules if k == kind}) for kind in self.KINDS}
+
+        def preceded_by(words, tail):
+            return '(?:' + '|'.join(rf'(?<=(?<![\w-]){re.escape(word)}{tail})' for word in words) + ')'
+
+        # Every branch starts with a punctuation literal, so the regex engine skips
+        # straight to candidate positions; identifiers are checked by lookbehind
+        # from the "(" or ":" that follows them. The named group closing each
+        # branch tells the scanner what was found.
+        branches = [
+            r'/\*(?P<comment>)',
+            r'"(?:[^"\\\n]|\\[\s\S])*"?(?P<double_quoted>)',
+            r"'(?:[^'\\\n]|\\[\s\S])*'?(?P<single_quoted>)",
+            r'\(' + preceded_by(['url'], r'\(') + r'\s*(?:[^"\'\s)][^)]*\)?)?(?P<url>)',
+        ]
+
+        if names['functions']:
+            branches.append(r'\(' + preceded_by(names['functions'], r'\(') + '(?P<functions>)')
+        if names['properties']:
+            branches.append(':' + preceded_by(names['properties'], ':') + '(?P<properties>)')
+        if names['pseudo_classes']:
+            alternation = '|'.join(re.escape(name) for name in names['pseudo_classes'])
+            branches.append(rf':(?<!::)(?P<pseudo_classes>{alternation})(?![\w-])')
+        if names['at_rules']:
+            alternation = '|'.join(re.escape(name) for name in names['at_rules'])
+            branches.append(rf'@(?P<at_rules>{alternation})(?![\w-])')
+        if names['nesting']:
+            branches.append(r'&(?![\w-])(?P<nesting>)')
+
+        return re.compile('|'.join(branches), self.FLAGS)
@@ -0,0 +1,171 @@
+import re
+import time
+from config import CSS_FEATURES
+from match_spans import MatchSpans
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+
+class FeatureMatcher:
+    FLAGS = re.IGNORECASE | re.MULTILINE
+
+    def __init__(self, features=None):
+        self.features = CSS_FEATURES if features is None else features
+        self.patterns = []
+        self.feature_patterns = {}
+
+        for feature_key, feature_data in self.features.items():
+            indexes = []
+            for pattern in feature_data.get('patterns', []):
+                indexes.append(len(self.patterns))
+                self.patterns.append((feature_key, re.compile(pattern, self.FLAGS)))
+            self.feature_patterns[feature_key] = indexes
+
+        # Inputs can share one scan only if no pattern looks at the text around a match
+        self.batchable = not any(self._has_assertions(compiled.pattern) for _, compiled in self.patterns)
+
+        anchors = [self._literal_prefix(compiled) for _, compiled in self.patterns]
+        self._unanchored = [i for i, anchor in enumerate(anchors) if not anchor]
+        self._anchored = [i for i, anchor in enumerate(anchors) if anchor]
+
+        unique_anchors = sorted({anchor for anchor in anchors if anchor})
+        self._candidates = {
+            anchor: [i for i in self._anchored if anchor.startswith(anchors[i])]
+            for anchor in unique_anchors
+        }
+        self._inner_offsets = {
+            anchor: [
+                k for k in range(1, len(anchor))
+                if any(other.startswith(anchor[k:]) or anchor[k:].startswith(other)
+                       for other in unique_anchors)
+            ]
+            for anchor in unique_anchors
+        }
+
+        self._anchor_re = None
+        if unique_anchors:
+            first_chars = ''.join(sorted({re.escape(anchor[0]) for anchor in unique_anchors}))
+            self._anchor_re = re.compile(
+                f'(?=[{first_chars}])' + self._trie_pattern(unique_anchors),
+                self.FLAGS
+            )
+
+    def find_all(self, text):
+        return self.scan(text, 0, len(text), [0] * len(self.patterns))
+
+    def find_all_timed(self, text):
+        timings = [0.0] * len(self.patterns)
+        return self.scan(text, 0, len(text), [0] * len(self.patterns), timings), timings
+
+    def scan(self, text, start, limit, last_end, timings=None):
+        spans = [MatchSpans() for _ in self.patterns]
+
+        if self._anchor_re is not None:
+            anchor_match = self._anchor_re.match
+
+            for match in self._anchor_re.finditer(text, start):
+                position = match.start()
+                if position >= limit:
+                    break
+
+                anchor = match.group(0).lower()
+                self._verify(text, position, anchor, spans, last_end, timings)
+
+                for offset in self._inner_offsets.get(anchor, ()):
+                    if position + offset >= limit:
+                        break
+
+                    inner = anchor_match(text, position + offset)
+                    if inner:
+                        self._verify(text, position + offset, inner.group(0).lower(), spans, last_end, timings)
+
+        for i in self._unanchored:
+            started = time.perf_counter() if timings is not None else 0.0
+            append = spans[i].append
+
+            for match in self.patterns[i][1].finditer(text, max(start, last_end[i])):
+                match_start, match_end = match.span()
+                if match_start >= limit:
+                    break
+
+                append(match_start, match_end)
+                last_end[i] = match_end if match_end > match_start else match_start + 1
+
+            if timings is not None:
+                timings[i] += time.perf_counter() - started
+
+        return spans
+
+    @staticmethod
+    def resume_offset(limit, last_end):
+        """Where the next streaming scan starts: patterns keep their own `last_end`, so simply `limit`."""
+        return limit
+
+    def _verify(self, text, start, anchor, spans, last_end, timings=None):
+        for i in self._candidates.get(anchor, self._anchored):
+            if start < last_end[i]:
+                continue
+
+            if timings is None:
+                match = self.patterns[i][1].match(text, start)
+            else:
+                started = time.perf_counter()
+                match = self.patterns[i][1].match(text, start)
+                timings[i] += time.perf_counter() - started
+
+            if match:
+                end = match.end()
+                spans[i].append(start, end)
+                last_end[i] = end if end > start else start + 1
+
+    @staticmethod
+    def _has_assertions(pattern):
+        assertions = (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+        stack = [sre_parse.parse(pattern, FeatureMatcher.FLAGS)]
+
+        while stack:
+            for op, av in stack.pop():
+                if op in assertions:
+                    return True
+                if op is sre_constants.BRANCH:
+                    stack.extend(av[1])
+                elif op is sre_constants.SUBPATTERN:
+                    stack.append(av[-1])
+                elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+                    stack.append(av[2])
+
+        return False
+
+    @staticmethod
+    def _literal_prefix(compiled):
+        prefix = []
+
+        for op, av in sre_parse.parse(compiled.pattern, compiled.flags):
+            if op is not sre_constants.LITERAL:
+                break
+            prefix.append(chr(av))
+
+        return ''.join(prefix).lower()
+
+    @staticmethod
+    def _trie_pattern(words):
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            return f'(?:{body})?' if '' in node else body
+
+        return build(trie)
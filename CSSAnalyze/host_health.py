@@ -0,0 +1,140 @@
+import asyncio
+import random
+import socket
+import time
+from urllib.parse import urlsplit
+
+from crawl_scheduler import CrawlScheduler
+from crawl_errors import CrawlError, classify_exception, is_transient, is_host_failure
+from config import (
+    PREFLIGHT_TIMEOUT,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    CIRCUIT_FAILURES,
+    CIRCUIT_COOLDOWN,
+)
+
+
+def retry_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Full jitter: uniform over [0, min(cap, base * 2^attempt)], so retries of many sites do not line up."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    def __init__(self, failures=CIRCUIT_FAILURES, cooldown=CIRCUIT_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.hosts = {}
+
+    def allow(self, host):
+        state = self.hosts.get(host)
+        if state is None or state[0] < self.failures:
+            return True
+
+        now = time.monotonic()
+        if now < state[1]:
+            return False
+
+        # Half-open: this caller probes the host, everyone else keeps failing fast until it reports back
+        state[1] = now + self.cooldown
+        return True
+
+    def success(self, host):
+        self.hosts.pop(host, None)
+
+    def failure(self, host):
+        state = self.hosts.setdefault(host, [0, 0.0])
+        state[0] += 1
+
+        if state[0] >= self.failures:
+            state[1] = time.monotonic() + self.cooldown
+
+    def open_hosts(self):
+        now = time.monotonic()
+        return sorted(host for host, (failures, until) in self.hosts.items()
+                      if failures >= self.failures and now < until)
+
+
+class HostHealth:
+    def __init__(self, attempts=RETRY_ATTEMPTS, preflight_timeout=PREFLIGHT_TIMEOUT, breaker=None):
+        self.attempts = attempts
+        self.preflight_timeout = preflight_timeout
+        self.breaker = CircuitBreaker() if breaker is None else breaker
+
+    async def preflight(self, url):
+        """DNS lookup and a TCP connect to the page's port: seconds for a dead host instead of a browser timeout."""
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        loop = asyncio.get_running_loop()
+
+        try:
+            addresses = await asyncio.wait_for(
+                loop.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM), self.preflight_timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise CrawlError("dns_failed", f"{parts.hostname}: {e or 'timeout'}") from e
+
+        try:
+            await self._connect_any(addresses, port)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise CrawlError(classify_exception(e), f"{parts.hostname}:{port}: {e or 'timeout'}") from e
+
+    async def _connect_any(self, addresses, port):
+        """Tries the resolved addresses in order, splitting the timeout between them, so a host whose
+        first record is AAAA still passes on a network without working IPv6."""
+        addresses = list(dict.fromkeys(address[4][0] for address in addresses))
+        timeout = self.preflight_timeout / len(addresses)
+        last_error = None
+
+        for address in addresses:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                last_error = e
+                continue
+
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return
+
+        raise last_error
+
+    async def call(self, url, attempt):
+        """(result, attempts) of `attempt()` retried with jittered backoff on transient CrawlErrors.
+
+        A request that finally fails on something pointing at the host counts once towards its circuit
+        breaker, however many tries it took; once the breaker opens, callers for that host get
+        host_unavailable without trying.
+        """
+        host = CrawlScheduler.host_of(url)
+        last_error = None
+
+        for tries in range(1, self.attempts + 1):
+            if not self.breaker.allow(host):
+                # A caller that already tried reports what went wrong, not the breaker it tripped
+                if last_error is not None:
+                    raise last_error
+
+                error = CrawlError("host_unavailable", host)
+                error.attempts = 0
+                raise error
+
+            try:
+                result = await attempt()
+            except CrawlError as e:
+                e.attempts = tries
+
+                if not is_transient(e.code) or tries == self.attempts:
+                    if is_host_failure(e.code):
+                        self.breaker.failure(host)
+                    raise
+
+                last_error = e
+                await asyncio.sleep(retry_delay(tries - 1))
+            else:
+                self.breaker.success(host)
+                return result, tries
@@ -0,0 +1,21 @@
+import re
+from array import array
+from bisect import bisect_left
+
+NEWLINE = re.compile('\n')
+
+
+class LineIndex:
+    def __init__(self, text):
+        self.text = text
+        self.total_lines = text.count('\n') + 1
+        self._newlines = None
+
+    def line_of(self, offset):
+        if self.total_lines == 1:
+            return 1
+
+        if self._newlines is None:
+            self._newlines = array('q', (match.start() for match in NEWLINE.finditer(self.text)))
+
+        return bisect_left(self._newlines, offset) + 1
@@ -0,0 +1,342 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import zlib
+from urllib.parse import urlsplit, unquote
+
+READ_BLOCK = 1024 * 1024
+WARC_HEADER_LIMIT = 64 * 1024
+COMPRESSED_MAGIC = (b'\x1f\x8b', b'BZh', b'\xfd7zXZ')
+
+
+def url_to_paths(url):
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    path = unquote(parts.path or '/').lstrip('/')
+
+    candidates = []
+
+    if parts.query:
+        candidates.append(f"{host}/{path}?{parts.query}")
+
+    if not path or path.endswith('/'):
+        candidates.append(f"{host}/{path}index.html")
+    else:
+        candidates.append(f"{host}/{path}")
+        candidates.append(f"{host}/{path}/index.html")
+        candidates.append(f"{host}/{path}.html")
+
+    return candidates
+
+
+def decode_body(data, charset=None):
+    return str(data, charset or 'utf-8', 'replace')
+
+
+class DirectoryCorpus:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def locate(self, url):
+        for relative_path in url_to_paths(url):
+            path = os.path.join(self.root, *relative_path.split('/'))
+
+            if os.path.isfile(path):
+                return path
+
+        return None
+
+    def read(self, url):
+        path = self.locate(url)
+        return self._read_file(path) if path else None
+
+    @staticmethod
+    def _read_file(path):
+        # Files above STREAMING_THRESHOLD are analyzed from `locate()` in chunks, so this only reads small ones
+        with open(path, 'rb') as f:
+            return decode_body(f.read())
+
+    def close(self):
+        pass
+
+
+def member_name(member):
+    return member.name[2:] if member.name.startswith('./') else member.name
+
+
+class TarCorpus:
+    """An uncompressed tar: members are read on demand by seeking to them."""
+
+    def __init__(self, path):
+        self.archive = tarfile.open(path, 'r:')
+        self.members = {}
+
+        for member in self.archive:
+            if member.isfile():
+                self.members[member_name(member)] = member
+
+    def read(self, url):
+        for relative_path in url_to_paths(url):
+            member = self.members.get(relative_path)
+
+            if member is not None:
+                f = self.archive.extractfile(member)
+                return decode_body(f.read()) if f else None
+
+        return None
+
+    def close(self):
+        self.archive.close()
+
+
+class ExtractedTarCorpus(DirectoryCorpus):
+    """A compressed tar unpacked once, in archive order, into a temporary directory.
+
+    A .tar.gz member can only be reached by decompressing everything before it, so reading members
+    in URL order would make the whole run quadratic in the archive size.
+    """
+
+    def __init__(self, path):
+        self.tempdir = tempfile.TemporaryDirectory(prefix='css-corpus-')
+        super().__init__(self.tempdir.name)
+
+        try:
+            with tarfile.open(path, 'r:*') as archive:
+                for member in archive:
+                    if member.isfile():
+                        self._extract(archive, member)
+        except BaseException:
+            self.tempdir.cleanup()
+            raise
+
+    def _extract(self, archive, member):
+        parts = member_name(member).split('/')
+
+        # Names that would leave the directory are not pages of a mirror anyway
+        if not parts[0] or '..' in parts:
+            return
+
+        target = os.path.join(self.root, *parts)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        with archive.extractfile(member) as source, open(target, 'wb') as f:
+            shutil.copyfileobj(source, f, READ_BLOCK)
+
+    def close(self):
+        self.tempdir.cleanup()
+
+
+def is_compressed(path):
+    with open(path, 'rb') as f:
+        return f.read(6).startswith(COMPRESSED_MAGIC)
+
+
+class WarcCorpus:
+    def __init__(self, path):
+        self.path = path
+        self.compressed = path.endswith('.gz')
+        self.file = open(path, 'rb')
+        self.records = {}
+
+        records = self._gzip_records() if self.compressed else self._plain_records()
+
+        for offset, headers in records:
+            record_type = headers.get('warc-type')
+            target = headers.get('warc-target-uri', '').strip('<>')
+
+            if record_type in ('response', 'resource') and target:
+                self.records.setdefault(self._normalize(target), offset)
+
+    def read(self, url):
+        offset = self.records.get(self._normalize(url))
+
+        if offset is None:
+            return None
+
+        return self._payload(self._read_record(offset))
+
+    def close(self):
+        self.file.close()
+
+    @staticmethod
+    def _normalize(url):
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        query = f"?{parts.query}" if parts.query else ''
+        return f"{(parts.hostname or '').lower()}{path}{query}"
+
+    @staticmethod
+    def _parse_headers(block):
+        lines = block.decode('latin-1').split('\r\n')
+        headers = {}
+
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        return lines[0], headers
+
+    def _plain_records(self):
+        self.file.seek(0)
+
+        while True:
+            offset = self.file.tell()
+            version = self.file.readline()
+
+            if not version:
+                return
+
+            if not version.strip():
+                continue
+
+            header_lines = [version.rstrip(b'\r\n')]
+            while True:
+                line = self.file.readline()
+                if not line or not line.strip():
+                    break
+                header_lines.append(line.rstrip(b'\r\n'))
+
+            _, headers = self._parse_headers(b'\r\n'.join(header_lines))
+            yield offset, headers
+
+            self.file.seek(int(headers.get('content-length', 0)), os.SEEK_CUR)
+
+    def _gzip_records(self):
+        self.file.seek(0)
+        position = 0
+        data = self.file.read(READ_BLOCK)
+
+        while data:
+            start = position
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            head = b''
+
+            while True:
+                output = decompressor.decompress(data)
+
+                if len(head) < WARC_HEADER_LIMIT:
+                    head += output[:WARC_HEADER_LIMIT - len(head)]
+
+                if decompressor.eof:
+                    position += len(data) - len(decompressor.unused_data)
+                    data = decompressor.unused_data
+                    break
+
+                position += len(data)
+                data = self.file.read(READ_BLOCK)
+
+                if not data:
+                    return
+
+            header_block = head.split(b'\r\n\r\n', 1)[0]
+            _, headers = self._parse_headers(header_block)
+            yield start, headers
+
+            if not data:
+                data = self.file.read(READ_BLOCK)
+
+    def _read_record(self, offset):
+        self.file.seek(offset)
+
+        if self.compressed:
+            return self._read_gzip_member()
+
+        header_lines = []
+        while True:
+            line = self.file.readline()
+            if not line or not line.strip():
+                break
+            header_lines.append(line.rstrip(b'\r\n'))
+
+        _, headers = self._parse_headers(b'\r\n'.join(header_lines))
+        block = self.file.read(int(headers.get('content-length', 0)))
+
+        return headers, block
+
+    def _read_gzip_member(self):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        output = bytearray()
+
+        while not decompressor.eof:
+            data = self.file.read(READ_BLOCK)
+            if not data:
+                break
+            output += decompressor.decompress(data)
+
+        header_block, _, rest = bytes(output).partition(b'\r\n\r\n')
+        _, headers = self._parse_headers(header_block)
+
+        return headers, rest[:int(headers.get('content-length', len(rest)))]
+
+    def _payload(self, record):
+        headers, block = record
+
+        if headers.get('warc-type') == 'resource':
+            return decode_body(block)
+
+        status_and_headers, _, body = block.partition(b'\r\n\r\n')
+        status_line, http_headers = self._parse_headers(status_and_headers)
+
+        status = status_line.split(' ')
+        if len(status) < 2 or status[1] != '200':
+            return None
+
+        if 'chunked' in http_headers.get('transfer-encoding', '').lower():
+            body = self._dechunk(body)
+
+        encoding = http_headers.get('content-encoding', '').lower()
+        if encoding in ('gzip', 'x-gzip'):
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+        elif encoding == 'br':
+            try:
+                import brotli
+            except ImportError:
+                return None
+            body = brotli.decompress(body)
+
+        charset = None
+        for param in http_headers.get('content-type', '').split(';')[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'charset':
+                charset = value.strip('"\'')
+
+        try:
+            return decode_body(body, charset)
+        except LookupError:
+            return decode_body(body)
+
+    @staticmethod
+    def _dechunk(body):
+        output = bytearray()
+        position = 0
+
+        while position < len(body):
+            line_end = body.find(b'\r\n', position)
+            if line_end == -1:
+                break
+
+            size = int(body[position:line_end].split(b';')[0] or b'0', 16)
+            if size == 0:
+                break
+
+            output += body[line_end + 2:line_end + 2 + size]
+            position = line_end + 2 + size + 2
+
+        return bytes(output)
+
+
+def open_corpus(path):
+    if os.path.isdir(path):
+        return DirectoryCorpus(path)
+
+    if path.endswith(('.warc', '.warc.gz')):
+        return WarcCorpus(path)
+
+    if tarfile.is_tarfile(path):
+        return ExtractedTarCorpus(path) if is_compressed(path) else TarCorpus(path)
+
+    raise ValueError(f"Неизвестный формат корпуса: {path}")
@@ -0,0 +1,32 @@
+from array import array
+
+
+class MatchSpans:
+    """Offsets of one pattern's matches in two int64 arrays instead of a tuple per match."""
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, starts=None, ends=None):
+        self.starts = array('q') if starts is None else starts
+        self.ends = array('q') if ends is None else ends
+
+    def append(self, start, end):
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MatchSpans(self.starts[index], self.ends[index])
+        return self.starts[index], self.ends[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"MatchSpans({list(self)!r})"
@@ -0,0 +1,296 @@
+import argparse
+import math
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from feature_matcher import FeatureMatcher, sre_parse, sre_constants
+from config import CSS_FEATURES, CACHE_DIR
+
+FUZZ_START = 16
+FUZZ_MAX_SIZE = 64 * 1024
+FUZZ_BUDGET = 0.5
+FUZZ_TIMEOUT = 10.0
+MIN_TIMING = 0.002
+MAX_EXPONENT = 1.5
+FAIL_CHAR = '\x00'
+
+CATEGORY_CHARS = {
+    sre_constants.CATEGORY_SPACE: ' ',
+    sre_constants.CATEGORY_WORD: 'a',
+    sre_constants.CATEGORY_DIGIT: '1',
+    sre_constants.CATEGORY_NOT_SPACE: 'a',
+    sre_constants.CATEGORY_NOT_WORD: ' ',
+    sre_constants.CATEGORY_NOT_DIGIT: 'a',
+}
+
+
+def sample_char(items):
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            return chr(av)
+        if op is sre_constants.RANGE:
+            return chr(av[0])
+        if op is sre_constants.CATEGORY:
+            return CATEGORY_CHARS.get(av, 'a')
+
+    return 'a'
+
+
+def sample(parsed):
+    """Shortest string matching a parsed pattern, good enough to reach the next node."""
+    parts = []
+
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            parts.append(chr(av))
+        elif op is sre_constants.NOT_LITERAL:
+            parts.append('a' if chr(av) != 'a' else 'b')
+        elif op is sre_constants.ANY:
+            parts.append('a')
+        elif op is sre_constants.IN:
+            negated = av and av[0][0] is sre_constants.NEGATE
+            parts.append('a' if negated else sample_char(av))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, 'POSSESSIVE_REPEAT', None)):
+            low, _, body = av
+            parts.append(sample(body) * low)
+        elif op is sre_constants.SUBPATTERN:
+            parts.append(sample(av[-1]))
+        elif op is sre_constants.BRANCH:
+            parts.append(sample(av[1][0]))
+
+    return ''.join(parts)
+
+
+def pumps(parsed, prefix=''):
+    """(prefix, pump) pairs for every unbounded repeat: the text before it and one repetition."""
+    found = []
+
+    for i, (op, av) in enumerate(parsed):
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[1] == sre_constants.MAXREPEAT:
+            body = av[2]
+            found.append((prefix, sample(body) or 'a'))
+            found.extend(pumps(body, prefix))
+        elif op is sre_constants.SUBPATTERN:
+            found.extend(pumps(av[-1], prefix))
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                found.extend(pumps(branch, prefix))
+
+        prefix += sample([(op, av)])
+
+    return found
+
+
+def adversarial_inputs(compiled):
+    """(name, prefix, pump, kind) for inputs that make each repeat backtrack."""
+    inputs = []
+
+    for prefix, pump in pumps(sre_parse.parse(compiled.pattern, compiled.flags)):
+        # One long repeat that fails at the end, the same repeat at every position, and many prefixes
+        inputs.append((f"{prefix!r} + {pump!r}*n + fail", prefix, pump, 'tail'))
+        inputs.append((f"{pump!r}*n + fail", '', pump, 'tail'))
+        if prefix:
+            inputs.append((f"({prefix!r} + {pump!r})*n", prefix, pump, 'cycle'))
+
+    return inputs
+
+
+def build_input(prefix, pump, kind, size):
+    if kind == 'cycle':
+        return (prefix + pump) * (size // len(prefix + pump) + 1)
+    return prefix + pump * (size // len(pump)) + FAIL_CHAR
+
+
+def grow(pattern, flags, prefix, pump, kind, max_size=FUZZ_MAX_SIZE, budget=FUZZ_BUDGET):
+    compiled = re.compile(pattern, flags)
+    size, timings, exponent = FUZZ_START, [], 0.0
+
+    while True:
+        text = build_input(prefix, pump, kind, size)
+        seconds = min(scan_time(compiled, text) for _ in range(3))
+        timings.append(seconds)
+
+        # Growth over the last two doublings, so one noisy run does not decide
+        if len(timings) >= 3 and timings[-3] > 0:
+            exponent = math.log(max(seconds / timings[-3], 1e-9), 4)
+
+        estimate = seconds * 2 ** max(exponent, 1)
+        if estimate > budget or size * 2 > max_size:
+            return {"exponent": exponent, "seconds": seconds, "size": len(text),
+                    "catastrophic": estimate > budget and exponent > MAX_EXPONENT}
+
+        size *= 2
+
+
+def _grow_in_child(conn, *args):
+    conn.send(grow(*args))
+    conn.close()
+
+
+def grow_with_timeout(args, timeout=FUZZ_TIMEOUT):
+    """Runs grow() in a child process: an exponential pattern never returns, so it is killed."""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    child = multiprocessing.Process(target=_grow_in_child, args=(sender,) + args, daemon=True)
+    child.start()
+    sender.close()
+
+    try:
+        if receiver.poll(timeout):
+            return receiver.recv()
+    except EOFError:
+        pass
+    finally:
+        child.terminate()
+        child.join()
+
+    return {"exponent": float('inf'), "seconds": timeout, "size": None, "catastrophic": True}
+
+
+def scan_time(compiled, text):
+    repeats = 0
+    started = time.perf_counter()
+
+    while True:
+        for _ in compiled.finditer(text):
+            pass
+
+        repeats += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_TIMING or elapsed * 8 > FUZZ_BUDGET:
+            return elapsed / repeats
+
+
+class PatternProfiler:
+    def __init__(self, features=None):
+        self.matcher = FeatureMatcher(features)
+
+    def profile(self, sources):
+        stats = [
+            {
+                "feature": feature_key,
+                "pattern": compiled.pattern,
+                "seconds": 0.0,
+                "matches": 0,
+                "bytes": 0,
+                "worst_source": None,
+                "worst_mb_per_s": None,
+            }
+            for feature_key, compiled in self.matcher.patterns
+        ]
+
+        for source, text in sources:
+            size = len(text.encode('utf-8', errors='surrogatepass'))
+
+            for (_, compiled), stat in zip(self.matcher.patterns, stats):
+                started = time.perf_counter()
+                matches = sum(1 for _ in compiled.finditer(text))
+                seconds = time.perf_counter() - started
+
+                stat['seconds'] += seconds
+                stat['matches'] += matches
+                stat['bytes'] += size
+
+                rate = size / (1024 * 1024) / seconds if seconds else float('inf')
+                if stat['worst_mb_per_s'] is None or rate < stat['worst_mb_per_s']:
+                    stat['worst_mb_per_s'] = rate
+                    stat['worst_source'] = source
+
+        return stats
+
+    def fuzz(self, max_size=FUZZ_MAX_SIZE, budget=FUZZ_BUDGET, timeout=FUZZ_TIMEOUT):
+        results = []
+
+        for feature_key, compiled in self.matcher.patterns:
+            worst = {"feature": feature_key, "pattern": compiled.pattern, "input": None,
+                     "exponent": 0.0, "seconds": 0.0, "size": 0, "catastrophic": False}
+
+            for name, prefix, pump, kind in adversarial_inputs(compiled):
+                args = (compiled.pattern, compiled.flags, prefix, pump, kind, max_size, budget)
+                result = grow_with_timeout(args, timeout)
+
+                if (result['catastrophic'], result['exponent']) > (worst['catastrophic'], worst['exponent']):
+                    worst.update(result, input=name)
+
+            worst['flagged'] = worst['catastrophic'] or worst['exponent'] > MAX_EXPONENT
+            results.append(worst)
+
+        return results
+
+
+def iter_css_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith('.css'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def read_sources(paths):
+    for path in iter_css_files(paths):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            yield path, f.read()
+
+
+def format_profile(stats):
+    total = sum(stat['seconds'] for stat in stats) or 1
+    lines = [f"{'Шаблон':<34} {'Время, с':>9} {'Доля':>6} {'MB/s':>9} {'Совпадений':>11} {'Худший MB/s':>12}  Худший файл"]
+
+    for stat in sorted(stats, key=lambda stat: -stat['seconds']):
+        rate = stat['bytes'] / (1024 * 1024) / stat['seconds'] if stat['seconds'] else 0
+        worst = stat['worst_mb_per_s'] or 0
+        lines.append(f"{stat['pattern'][:34]:<34} {stat['seconds']:>9.3f} {stat['seconds'] / total:>6.1%} "
+                     f"{rate:>9.1f} {stat['matches']:>11} {worst:>12.1f}  {stat['worst_source'] or ''}")
+
+    return "\n".join(lines)
+
+
+def format_fuzz(results):
+    lines = [f"{'Шаблон':<34} {'Рост':>6} {'Размер':>8} {'Время, с':>9}  Вход"]
+
+    for result in results:
+        marker = '  КАТАСТРОФИЧЕСКИЙ' if result['catastrophic'] else '  СВЕРХЛИНЕЙНЫЙ' if result['flagged'] else ''
+        lines.append(f"{result['pattern'][:34]:<34} n^{result['exponent']:<4.1f} {result['size'] or '-':>8} "
+                     f"{result['seconds']:>9.4f}  {result['input'] or 'без повторов'}{marker}")
+
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Стоимость шаблонов CSS_FEATURES: время на корпусе и поиск катастрофического backtracking')
+    parser.add_argument('paths', nargs='*', default=[os.path.join(str(CACHE_DIR), 'blobs')],
+                        help='CSS-файлы или каталоги (по умолчанию - кэш CSS)')
+    parser.add_argument('--no-fuzz', action='store_true', help='не проверять шаблоны на враждебных строках')
+    parser.add_argument('--max-size', type=int, default=FUZZ_MAX_SIZE, help='максимальная длина враждебной строки')
+    parser.add_argument('--budget', type=float, default=FUZZ_BUDGET, help='предел времени одного прогона, с')
+    parser.add_argument('--timeout', type=float, default=FUZZ_TIMEOUT,
+                        help='предел времени проверки одной строки; дольше - шаблон катастрофический')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    profiler = PatternProfiler(CSS_FEATURES)
+
+    print(format_profile(profiler.profile(read_sources(args.paths))))
+
+    if args.no_fuzz:
+        return
+
+    results = profiler.fuzz(args.max_size, args.budget, args.timeout)
+    print()
+    print(format_fuzz(results))
+
+    flagged = [result['pattern'] for result in results if result['flagged']]
+    if flagged:
+        print(f"Опасные шаблоны: {', '.join(flagged)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,53 @@
-from collections import Counter, defaultdict
+import os
+
+from report_stats import ReportStats
+from crawl_errors import describe_error
 from config import CSS_FEATURES
 
 
+def report_stats(results):
+    """Stats for the report: numpy UsageStats for a table or .npz, pure-Python ReportStats for JSON/JSONL or a dict."""
+    if isinstance(results, ReportStats):
+        return results
+    if isinstance(results, dict):
+        return ReportStats.from_results(results)
+    if isinstance(results, (str, os.PathLike)) and not os.fspath(results).endswith('.npz'):
+        return ReportStats.from_file(results)
+
+    from usage_stats import UsageStats
+    return UsageStats.from_results(results)
+
+
 def generate_summary_report(results):
+    stats = report_stats(results)
+    
     lines = []
     lines.append("="*80)
     lines.append("ИТОГОВЫЙ ОТЧЕТ: ИСПОЛЬЗОВАНИЕ СОВРЕМЕННЫХ CSS")
     lines.append("="*80)
-    lines.append(f"Всего сайтов проанализировано: {results['total_sites']}")
-    lines.append("")
+    lines.append(f"Всего сайтов проанализировано: {stats.total_sites}")
+    lines.append(f"Без ошибок: {stats.analyzed_sites}, с ошибкой: {stats.failed_sites}")
     
-    feature_usage = Counter()
-    sites_using_features = defaultdict(list)
+    if stats.failed_sites:
+        for code, count in stats.error_counts():
+            lines.append(f"   {describe_error(code)}: {count}")
     
-    for cat_name, cat_data in results['categories'].items():
-        for site_name, site_data in cat_data['sites'].items():
-            for feature_key, feature_info in site_data.get('features_summary', {}).items():
-                feature_usage[feature_key] += 1
-                sites_using_features[feature_key].append(site_name)
+    lines.append("")
     
     lines.append("ОБЩАЯ СТАТИСТИКА ПО CSS-ВОЗМОЖНОСТЯМ")
     lines.append("-" * 80)
     lines.append("")
     
     for feature_key, feature_data in CSS_FEATURES.items():
-        usage_count = feature_usage.get(feature_key, 0)
-        percentage = (usage_count / results['total_sites'] * 100) if results['total_sites'] > 0 else 0
+        feature = stats.feature_index(feature_key)
+        usage_count = int(stats.feature_sites[feature])
         
         lines.append(f"{feature_data['name']}")
         lines.append(f"   Описание: {feature_data['description']}")
-        lines.append(f"   Использование: {usage_count}/{results['total_sites']} сайтов ({percentage:.1f}%)")
+        lines.append(f"   Использование: {usage_count}/{stats.analyzed_sites} сайтов ({stats.feature_share(feature):.1f}%)")
         
         if usage_count > 0:
-            lines.append(f"   Сайты: {', '.join(sites_using_features[feature_key][:5])}")
+            lines.append(f"   Сайты: {', '.join(stats.sites_with_feature(feature, 5))}")
         
         lines.append("")
     
@@ -41,23 +56,30 @@ def generate_summary_report(results):
     lines.append("ДЕТАЛЬНЫЙ ОТЧЕТ ПО КАТЕГОРИЯМ")
     lines.append("="*80)
     
-    for cat_name, cat_data in results['categories'].items():
+    for category, category_sites in enumerate(stats.category_site_order()):
         lines.append(f"\n{'#'*80}")
-        lines.append(f"# {cat_name.upper()}")
+        lines.append(f"# {stats.categories[category].upper()}")
         lines.append(f"{'#'*80}\n")
         
-        for site_name, site_data in cat_data['sites'].items():
-            lines.append(f"{site_name}")
-            lines.append(f"   URL: {site_data['url']}")
+        if stats.category_sites[category]:
+            lines.append(f"В среднем возможностей на сайт: {stats.category_average(category):.1f}")
+            lines.append(f"Сайтов с современными CSS: {stats.category_adopters[category]}/"
+                         f"{stats.category_sites[category]} ({stats.category_adoption(category):.1f}%)")
+            lines.append("")
+        
+        for site in category_sites:
+            lines.append(f"{stats.site_name(site)}")
+            lines.append(f"   URL: {stats.site_url(site)}")
             
-            if site_data.get('error'):
-                lines.append(f"   Ошибка: {site_data['error']}")
+            if stats.site_error(site):
+                lines.append(f"   Ошибка: {describe_error(stats.site_error(site))}")
             else:
-                lines.append(f"   Найдено современных возможностей: {site_data['total_features_found']}")
+                lines.append(f"   Найдено современных возможностей: {stats.site_scores[site]}")
                 
-                if site_data.get('features_summary'):
-                    for feature_key, feature_info in site_data['features_summary'].items():
-                        lines.append(f"      {feature_info['name']}: {feature_info['total_occurrences']} упоминаний")
+                site_features = stats.site_features(site)
+                if site_features:
+                    for feature, count in site_features:
+                        lines.append(f"      {stats.feature_name(feature)}: {count} упоминаний")
                 else:
                     lines.append(f"      Современные CSS-возможности не обнаружены")
             
@@ -0,0 +1,119 @@
+import os
+
+from results_file import iter_results, read_results, iter_stylesheets
+from config import CSS_FEATURES
+
+
+class ReportStats:
+    """The numbers of the text report gathered in pure Python, one site at a time.
+
+    Same answers as UsageStats for the methods the report uses; `report` on a JSON/JSONL file
+    does not need the numpy table, so it does not import numpy.
+    """
+
+    def __init__(self, sites, total_sites=None):
+        features = {feature_key: i for i, feature_key in enumerate(CSS_FEATURES)}
+        categories = {}
+
+        self.site_category = []
+        self.site_names = []
+        self.site_urls = []
+        self.site_errors = []
+        self.site_occurrences = []
+
+        for cat_name, site_name, site_data in sites:
+            error = str(site_data.get('error') or '')
+            totals = {}
+
+            for _, stylesheet in iter_stylesheets(site_data):
+                for feature_key, feature_info in stylesheet.get('features', {}).items():
+                    feature = features.setdefault(feature_key, len(features))
+                    if not error:
+                        totals[feature] = totals.get(feature, 0) + feature_info['count']
+
+            self.site_category.append(categories.setdefault(cat_name, len(categories)))
+            self.site_names.append(site_name)
+            self.site_urls.append(site_data.get('url', ''))
+            self.site_errors.append(error)
+            self.site_occurrences.append({feature: count for feature, count in sorted(totals.items()) if count > 0})
+
+        self.categories = list(categories)
+        self.features = list(features)
+        self.total_sites = len(self.site_names) if total_sites is None else total_sites
+
+        valid = [not error for error in self.site_errors]
+        self.analyzed_sites = sum(valid)
+        self.failed_sites = self.total_sites - self.analyzed_sites
+
+        self.site_scores = [len(occurrences) for occurrences in self.site_occurrences]
+        self.feature_sites = [0] * len(self.features)
+        for occurrences in self.site_occurrences:
+            for feature in occurrences:
+                self.feature_sites[feature] += 1
+
+        self.category_sites = [0] * len(self.categories)
+        self.category_feature_totals = [0] * len(self.categories)
+        self.category_adopters = [0] * len(self.categories)
+
+        for site, category in enumerate(self.site_category):
+            self.category_feature_totals[category] += self.site_scores[site]
+            if valid[site]:
+                self.category_sites[category] += 1
+                self.category_adopters[category] += self.site_scores[site] > 0
+
+    @classmethod
+    def from_results(cls, results):
+        return cls(iter_results(results), results['total_sites'])
+
+    @classmethod
+    def from_file(cls, path):
+        total_sites, sites = read_results(os.fspath(path))
+        return cls(sites, total_sites)
+
+    def error_counts(self):
+        counts = {}
+        for error in self.site_errors:
+            if error:
+                counts[error] = counts.get(error, 0) + 1
+
+        return sorted(sorted(counts.items()), key=lambda item: -item[1])
+
+    def feature_index(self, feature_key):
+        return self.features.index(feature_key)
+
+    def feature_name(self, feature):
+        feature_key = self.features[feature]
+        return CSS_FEATURES.get(feature_key, {}).get('name', feature_key)
+
+    def feature_share(self, feature):
+        return self.feature_sites[feature] / self.analyzed_sites * 100 if self.analyzed_sites else 0
+
+    def sites_with_feature(self, feature, limit=None):
+        names = [self.site_names[site] for site, occurrences in enumerate(self.site_occurrences)
+                 if feature in occurrences]
+        return names[:limit]
+
+    def category_average(self, category):
+        return self.category_feature_totals[category] / self.category_sites[category]
+
+    def category_adoption(self, category):
+        return self.category_adopters[category] / self.category_sites[category] * 100
+
+    def category_site_order(self):
+        order = [[] for _ in self.categories]
+        for site, category in enumerate(self.site_category):
+            order[category].append(site)
+
+        return order
+
+    def site_name(self, site):
+        return self.site_names[site]
+
+    def site_url(self, site):
+        return self.site_urls[site]
+
+    def site_error(self, site):
+        return self.site_errors[site]
+
+    def site_features(self, site):
+        return list(self.site_occurrences[site].items())
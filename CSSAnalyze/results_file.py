@@ -0,0 +1,103 @@
+import json
+
+from config import WEBSITES
+
+SITES_EXTENSIONS = ('.jsonl', '.ndjson')
+
+
+def is_sites_file(path):
+    return str(path).endswith(SITES_EXTENSIONS)
+
+
+def category_sizes(websites=WEBSITES):
+    return {cat_name: len(category_sites) for cat_name, category_sites in websites.items()}
+
+
+def write_sites(path, sites, websites=WEBSITES):
+    """A header with the site counts, then one {"category", "site", "result"} line per site."""
+    categories = category_sizes(websites)
+    written = 0
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"total_sites": sum(categories.values()), "categories": categories},
+                           ensure_ascii=False) + '\n')
+
+        for cat_name, site_name, result in sites:
+            f.write(json.dumps({"category": cat_name, "site": site_name, "result": result}, ensure_ascii=False))
+            f.write('\n')
+            written += 1
+
+    return written
+
+
+def read_header(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.loads(f.readline())
+
+
+def iter_sites(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        f.readline()
+
+        for line in f:
+            record = json.loads(line)
+            yield record['category'], record['site'], record['result']
+
+
+def iter_results(results):
+    """(category, site, result) of a results dict in the css_usage_analysis.json layout."""
+    for cat_name, cat_data in results['categories'].items():
+        for site_name, site_data in cat_data['sites'].items():
+            yield cat_name, site_name, site_data
+
+
+def iter_stylesheets(site_data):
+    if site_data.get('inline_css'):
+        yield True, site_data['inline_css']
+
+    for css_file in site_data.get('external_css', []):
+        yield False, css_file
+
+
+def read_results(path):
+    """(total_sites, iterator of (category, site, result)) for a .jsonl file or the old single JSON."""
+    if is_sites_file(path):
+        return read_header(path)['total_sites'], iter_sites(path)
+
+    # The old layout is one JSON document, so it can only be read whole
+    with open(path, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+
+    return results['total_sites'], iter_results(results)
+
+
+def write_json(path, sites, categories):
+    """The css_usage_analysis.json layout written site by site; sites come grouped in `categories` order."""
+    sites = iter(sites)
+
+    with open(path, 'w', encoding='utf-8') as output:
+        output.write('{\n  "total_sites": %d,\n  "categories": {' % sum(categories.values()))
+
+        for i, (cat_name, size) in enumerate(categories.items()):
+            output.write(',' if i else '')
+            output.write(f'\n    {json.dumps(cat_name, ensure_ascii=False)}: {{')
+            output.write(f'\n      "total_sites": {size},\n      "sites": {{')
+
+            for j in range(size):
+                _, site_name, result = next(sites)
+
+                output.write(',' if j else '')
+                output.write(f'\n        {json.dumps(site_name, ensure_ascii=False)}: ')
+                output.write(_indent(json.dumps(result, ensure_ascii=False, indent=2), 8))
+
+            output.write('\n      }\n    }' if size else '}\n    }')
+
+        output.write('\n  }\n}' if categories else '}\n}')
+
+
+def export_json(sites_path, json_path):
+    write_json(json_path, iter_sites(sites_path), read_header(sites_path)['categories'])
+
+
+def _indent(text, width):
+    return text.replace('\n', '\n' + ' ' * width)
@@ -0,0 +1,140 @@
+from array import array
+
+import numpy as np
+
+from config import CSS_FEATURES
+from results_file import iter_results as iter_sites, iter_stylesheets
+
+
+class ResultsTable:
+    SITE_COLUMNS = ('site_category', 'site_name', 'site_url', 'site_error')
+    SHEET_COLUMNS = ('sheet_site', 'sheet_source', 'sheet_inline', 'sheet_chars', 'sheet_lines')
+    ROW_COLUMNS = ('row_site', 'row_sheet', 'row_feature', 'row_count', 'row_chars')
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.total_sites = int(columns['total_sites'])
+        self.categories = columns['categories']
+        self.features = columns['features']
+
+        for name in self.SITE_COLUMNS + self.SHEET_COLUMNS + self.ROW_COLUMNS:
+            setattr(self, name, columns[name])
+
+        self._pairs = None
+        self._occurrences = None
+
+    @classmethod
+    def from_results(cls, results):
+        return cls.from_sites(iter_sites(results), results['total_sites'])
+
+    @classmethod
+    def from_file(cls, path):
+        """Table of a .jsonl results file read one site at a time (or of the old single JSON)."""
+        from results_file import read_results
+
+        total_sites, sites = read_results(path)
+        return cls.from_sites(sites, total_sites)
+
+    @classmethod
+    def from_sites(cls, sites, total_sites=None):
+        categories = {}
+        features = {feature_key: i for i, feature_key in enumerate(CSS_FEATURES)}
+        strings = {name: [] for name in ('site_name', 'site_url', 'site_error', 'sheet_source')}
+        numbers = {
+            name: array('q')
+            for name in ('site_category', 'sheet_site', 'sheet_inline', 'sheet_chars', 'sheet_lines')
+            + cls.ROW_COLUMNS
+        }
+
+        site = -1
+        for site, (cat_name, site_name, site_data) in enumerate(sites):
+            numbers['site_category'].append(categories.setdefault(cat_name, len(categories)))
+            strings['site_name'].append(site_name)
+            strings['site_url'].append(site_data.get('url', ''))
+            strings['site_error'].append(str(site_data.get('error') or ''))
+
+            for inline, stylesheet in iter_stylesheets(site_data):
+                sheet = len(numbers['sheet_site'])
+                chars = stylesheet.get('total_chars', 0)
+
+                numbers['sheet_site'].append(site)
+                numbers['sheet_inline'].append(inline)
+                numbers['sheet_chars'].append(chars)
+                numbers['sheet_lines'].append(stylesheet.get('total_lines', 0))
+                strings['sheet_source'].append(stylesheet.get('source', ''))
+
+                for feature_key, feature_info in stylesheet.get('features', {}).items():
+                    numbers['row_site'].append(site)
+                    numbers['row_sheet'].append(sheet)
+                    numbers['row_feature'].append(features.setdefault(feature_key, len(features)))
+                    numbers['row_count'].append(feature_info['count'])
+                    numbers['row_chars'].append(chars)
+
+        columns = {name: np.frombuffer(values, dtype=np.int64) for name, values in numbers.items()}
+        columns.update({name: np.array(values, dtype=str) for name, values in strings.items()})
+        columns['sheet_inline'] = columns['sheet_inline'].astype(bool)
+        columns['categories'] = np.array(list(categories), dtype=str)
+        columns['features'] = np.array(list(features), dtype=str)
+        columns['total_sites'] = np.int64(site + 1 if total_sites is None else total_sites)
+
+        return cls(columns)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **self.columns)
+
+    @property
+    def site_count(self):
+        return len(self.site_name)
+
+    def valid_sites(self):
+        return self.site_error == ''
+
+    def site_feature_pairs(self):
+        if self._pairs is None:
+            feature_count = len(self.features)
+            used = self.valid_sites()[self.row_site] & (self.row_count > 0)
+            keys = np.unique(self.row_site[used] * feature_count + self.row_feature[used])
+            self._pairs = (keys // feature_count, keys % feature_count)
+
+        return self._pairs
+
+    def feature_site_counts(self):
+        _, pair_feature = self.site_feature_pairs()
+        return np.bincount(pair_feature, minlength=len(self.features))
+
+    def category_feature_counts(self):
+        pair_site, pair_feature = self.site_feature_pairs()
+        feature_count = len(self.features)
+        keys = self.site_category[pair_site] * feature_count + pair_feature
+
+        counts = np.bincount(keys, minlength=len(self.categories) * feature_count)
+        return counts.reshape(len(self.categories), feature_count)
+
+    def site_feature_counts(self):
+        pair_site, _ = self.site_feature_pairs()
+        return np.bincount(pair_site, minlength=self.site_count)
+
+    def sites_with_feature(self, feature, limit=None):
+        pair_site, pair_feature = self.site_feature_pairs()
+        return pair_site[pair_feature == feature][:limit]
+
+    def occurrences(self):
+        if self._occurrences is None:
+            feature_count = len(self.features)
+            used = self.valid_sites()[self.row_site]
+            keys = self.row_site[used] * feature_count + self.row_feature[used]
+
+            totals = np.bincount(keys, weights=self.row_count[used], minlength=self.site_count * feature_count)
+            self._occurrences = totals.astype(np.int64).reshape(self.site_count, feature_count)
+
+        return self._occurrences
+
+    def feature_name(self, feature):
+        feature_key = str(self.features[feature])
+        return CSS_FEATURES.get(feature_key, {}).get('name', feature_key)
@@ -0,0 +1,69 @@
+from config import WEBSITES, CSS_FEATURES
+
+
+def empty_site_results(name, url):
+    return {
+        "name": name,
+        "url": url,
+        "inline_css": {},
+        "external_css": [],
+        "features_summary": {},
+        "total_features_found": 0
+    }
+
+
+def summarize_features(site_results):
+    all_features = set()
+
+    if site_results['inline_css'].get('features'):
+        all_features.update(site_results['inline_css']['features'].keys())
+
+    for css_file in site_results['external_css']:
+        if css_file.get('features'):
+            all_features.update(css_file['features'].keys())
+
+    for feature_key in CSS_FEATURES:
+        if feature_key not in all_features:
+            continue
+
+        feature_name = CSS_FEATURES[feature_key]['name']
+        total_count = 0
+
+        if site_results['inline_css'].get('features', {}).get(feature_key):
+            total_count += site_results['inline_css']['features'][feature_key]['count']
+
+        for css_file in site_results['external_css']:
+            if css_file.get('features', {}).get(feature_key):
+                total_count += css_file['features'][feature_key]['count']
+
+        site_results['features_summary'][feature_key] = {
+            "name": feature_name,
+            "total_occurrences": total_count,
+            "description": CSS_FEATURES[feature_key]['description']
+        }
+
+    site_results['total_features_found'] = len(all_features)
+
+    return site_results
+
+
+def assemble_results(site_result_for, websites=WEBSITES):
+    results = {
+        "total_sites": 0,
+        "categories": {}
+    }
+
+    for cat_name, category_sites in websites.items():
+
+        category_results = {
+            "total_sites": len(category_sites),
+            "sites": {}
+        }
+
+        for site_name in category_sites:
+            category_results['sites'][site_name] = site_result_for(cat_name, site_name)
+            results['total_sites'] += 1
+
+        results['categories'][cat_name] = category_results
+
+    return results
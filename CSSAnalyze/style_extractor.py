@@ -0,0 +1,115 @@
+import html as html_entities
+import re
+from urllib.parse import urljoin
+
+IMPORT_SCAN_CHARS = 64 * 1024
+
+COMMENT_PATTERN = re.compile(r'/\*.*?(?:\*/|$)', re.DOTALL)
+IMPORT_PATTERN = re.compile(
+    r'@import\s+(?:url\(\s*(["\']?)([^"\')]+)\1\s*\)|(["\'])([^"\']+)\3)',
+    re.IGNORECASE
+)
+
+# Only the tags that matter: <style>, <link>, <base>, plus comments and raw-text elements to skip over;
+# the lookahead lets every other '<' fail on its first character
+TAG_PATTERN = re.compile(
+    r'<(?=[!sSlLbBtTxX])(?:!--|(style|link|base|script|textarea|title|xmp)(?=[\s/>])'
+    r'((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>?)',
+    re.IGNORECASE
+)
+ATTRIBUTE_PATTERN = re.compile(r'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+RAW_TEXT_END = {
+    tag: re.compile(rf'</{tag}(?=[\s/>])[^>]*>?|</{tag}$', re.IGNORECASE)
+    for tag in ('style', 'script', 'textarea', 'title', 'xmp')
+}
+
+
+def tag_attributes(source):
+    """Attribute values by lowercase name; the first of repeated attributes wins, as in browsers."""
+    attrs = {}
+
+    for match in ATTRIBUTE_PATTERN.finditer(source):
+        name = match.group(1).lower()
+        if name not in attrs:
+            value = next((group for group in match.group(2, 3, 4) if group is not None), '')
+            attrs[name] = html_entities.unescape(value) if '&' in value else value
+
+    return attrs
+
+
+def is_stylesheet_link(attrs):
+    rel = attrs.get('rel', '').lower().split()
+
+    # rel=preload as=style is usually switched to a stylesheet by script after loading
+    return 'stylesheet' in rel or ('preload' in rel and attrs.get('as', '').strip().lower() == 'style')
+
+
+def scan_html(html):
+    """(inline blocks, stylesheet hrefs, first <base href>) in one pass over the tags that matter."""
+    inline_styles = []
+    hrefs = []
+    base_href = None
+    position = 0
+
+    while True:
+        match = TAG_PATTERN.search(html, position)
+        if match is None:
+            break
+
+        tag = match.group(1)
+        if tag is None:
+            close = html.find('-->', match.end())
+            position = len(html) if close == -1 else close + 3
+            continue
+
+        tag = tag.lower()
+        position = match.end()
+
+        if tag in RAW_TEXT_END:
+            end = RAW_TEXT_END[tag].search(html, position)
+            if tag == 'style':
+                inline_styles.append(html[position:end.start() if end else len(html)])
+            position = end.end() if end else len(html)
+            continue
+
+        attrs = tag_attributes(match.group(2))
+        href = attrs.get('href', '').strip()
+
+        if not href:
+            continue
+
+        if tag == 'base':
+            # Only the first <base href> counts, and it applies to the whole document
+            if base_href is None:
+                base_href = href
+        elif is_stylesheet_link(attrs):
+            hrefs.append(href)
+
+    return inline_styles, hrefs, base_href
+
+
+def extract_styles(html, base_url):
+    """(inline blocks, stylesheet URLs): links in document order without repeats, then @import of inline blocks."""
+    inline_styles, hrefs, base_href = scan_html(html)
+
+    if base_href is not None:
+        base_url = urljoin(base_url, base_href)
+
+    css_links = [urljoin(base_url, href) for href in hrefs]
+    for block in inline_styles:
+        css_links.extend(import_urls(block, base_url))
+
+    return inline_styles, list(dict.fromkeys(css_links))
+
+
+def import_urls(css_content, base_url):
+    # @import is only valid before the first rule, so the text up to the first block is enough
+    head = COMMENT_PATTERN.sub('', css_content[:IMPORT_SCAN_CHARS])
+    brace = head.find('{')
+    if brace >= 0:
+        head = head[:brace]
+
+    return [
+        urljoin(base_url, (match.group(2) or match.group(4)).strip())
+        for match in IMPORT_PATTERN.finditer(head)
+    ]
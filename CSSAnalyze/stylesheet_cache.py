@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import OrderedDict
+
+from config import (CACHE_DIR, CACHE_MAX_BYTES, CSS_FEATURES, STREAMING_THRESHOLD, ANALYSIS_MODE,
+                    INSTANCE_SAMPLES)
+
+MEMORY_ANALYSES = 256
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+def features_fingerprint(features=CSS_FEATURES, mode=ANALYSIS_MODE, samples=INSTANCE_SAMPLES):
+    """Key of everything that shapes a cached analysis, the number of kept instances included."""
+    payload = json.dumps({"mode": mode, "features": features, "samples": samples}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def stylesheet_set_fingerprint(inline_css, stylesheets, mode=ANALYSIS_MODE, samples=INSTANCE_SAMPLES):
+    """Identity of a page's CSS: inline blocks, (url, content hash) of every stylesheet and the feature set."""
+    digest = hashlib.sha256(features_fingerprint(mode=mode, samples=samples).encode('utf-8'))
+    digest.update(content_hash(inline_css or '').encode('utf-8'))
+
+    for url, stylesheet_hash in sorted(stylesheets, key=lambda item: (item[0], item[1] or '')):
+        digest.update(f"\n{url}\t{stylesheet_hash or ''}".encode('utf-8'))
+
+    return digest.hexdigest()[:32]
+
+
+class StylesheetCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, mode=ANALYSIS_MODE,
+                 samples=INSTANCE_SAMPLES):
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+        self.urls_dir = os.path.join(self.cache_dir, 'urls')
+        self.blobs_dir = os.path.join(self.cache_dir, 'blobs')
+        self.analysis_dir = os.path.join(self.cache_dir, 'analysis')
+        self.spool_dir = os.path.join(self.cache_dir, 'spool')
+        self.features_key = features_fingerprint(mode=mode, samples=samples)
+        self.analyses = OrderedDict()
+
+        for directory in (self.urls_dir, self.blobs_dir, self.analysis_dir, self.spool_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    def lookup(self, url):
+        entry = self._read_json(self._url_path(url))
+
+        if not entry or not os.path.exists(self._blob_path(entry['content_hash'])):
+            return None
+
+        return entry
+
+    def is_fresh(self, entry):
+        expires = entry.get('expires')
+        return expires is not None and expires > time.time()
+
+    def read_content(self, digest):
+        path = self._blob_path(digest)
+
+        try:
+            with open(path, 'r', encoding='utf-8', errors='surrogatepass') as f:
+                content = f.read()
+        except OSError:
+            return None
+
+        self._touch(path)
+        return content
+
+    def open_stylesheet(self, digest):
+        path = self._blob_path(digest)
+
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+
+        if size > STREAMING_THRESHOLD:
+            self._touch(path)
+            return {"content": None, "path": path, "content_hash": digest}
+
+        content = self.read_content(digest)
+        if content is None:
+            return None
+
+        return {"content": content, "path": None, "content_hash": digest}
+
+    def store(self, url, content, etag=None, last_modified=None, max_age=None):
+        digest = content_hash(content)
+        blob_path = self._blob_path(digest)
+
+        if not os.path.exists(blob_path):
+            self._write(blob_path, content.encode('utf-8', errors='surrogatepass'))
+
+        self._store_url(url, digest, etag, last_modified, max_age)
+        return digest
+
+    def store_file(self, url, path, digest, etag=None, last_modified=None, max_age=None):
+        blob_path = self._blob_path(digest)
+
+        if os.path.exists(blob_path):
+            os.remove(path)
+        else:
+            os.replace(path, blob_path)
+            self.total_bytes += os.path.getsize(blob_path)
+
+        self._store_url(url, digest, etag, last_modified, max_age)
+        return blob_path
+
+    def _store_url(self, url, digest, etag, last_modified, max_age):
+        self._write(self._url_path(url), json.dumps({
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires": time.time() + max_age if max_age else None,
+            "content_hash": digest,
+        }).encode('utf-8'))
+
+        self._evict()
+
+    def refresh(self, entry, etag=None, last_modified=None, max_age=None):
+        entry = dict(entry)
+        entry['etag'] = etag or entry.get('etag')
+        entry['last_modified'] = last_modified or entry.get('last_modified')
+        entry['expires'] = time.time() + max_age if max_age else None
+
+        self._write(self._url_path(entry['url']), json.dumps(entry).encode('utf-8'))
+        return entry
+
+    def get_analysis(self, digest, source_url):
+        analysis = self.analyses.get(digest)
+
+        if analysis is None:
+            path = self._analysis_path(digest)
+            analysis = self._read_json(path)
+            if analysis is None:
+                return None
+
+            self._touch(path)
+            self._remember(digest, analysis)
+        else:
+            self.analyses.move_to_end(digest)
+
+        return {"source": source_url, **analysis}
+
+    def store_analysis(self, digest, analysis):
+        analysis = {key: value for key, value in analysis.items() if key not in ('source', 'timings')}
+        self._remember(digest, analysis)
+
+        self._write(
+            self._analysis_path(digest),
+            json.dumps(analysis, ensure_ascii=False).encode('utf-8')
+        )
+        self._evict()
+
+    def _remember(self, digest, analysis):
+        self.analyses[digest] = analysis
+        if len(self.analyses) > MEMORY_ANALYSES:
+            self.analyses.popitem(last=False)
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self.analyses.clear()
+        self.total_bytes = 0
+
+        for directory in (self.urls_dir, self.blobs_dir, self.analysis_dir, self.spool_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        target = self.max_bytes * 0.9
+
+        for _, path, size in sorted(self._entries()):
+            if self.total_bytes <= target:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            self.total_bytes -= size
+
+            name = os.path.basename(path)
+            if path.startswith(self.analysis_dir):
+                self.analyses.pop(name.split('-', 1)[0], None)
+
+    def _entries(self):
+        for directory in (self.blobs_dir, self.analysis_dir):
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        yield stat.st_mtime, entry.path, stat.st_size
+
+    def _url_path(self, url):
+        return os.path.join(self.urls_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blobs_dir, digest + '.css')
+
+    def _analysis_path(self, digest):
+        return os.path.join(self.analysis_dir, f"{digest}-{self.features_key}.json")
+
+    def _write(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        tracked = not path.startswith(self.urls_dir)
+
+        if tracked and os.path.exists(path):
+            self.total_bytes -= os.path.getsize(path)
+
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+
+        os.replace(tmp_path, path)
+
+        if tracked:
+            self.total_bytes += len(data)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
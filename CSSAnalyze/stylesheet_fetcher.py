@@ -0,0 +1,171 @@
+import asyncio
+import codecs
+import hashlib
+import importlib.util
+import os
+import tempfile
+
+import httpx
+
+from crawl_errors import classify_exception
+from config import (
+    MAX_STYLESHEET_BYTES,
+    STREAMING_THRESHOLD,
+    STYLESHEET_TIMEOUT,
+    MAX_CONCURRENT_REQUESTS,
+    USER_AGENT,
+)
+
+# httpx imports h2 itself when http2=True; here it is only checked for
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+class TextSpool:
+    def __init__(self, directory, encoding):
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.digest = hashlib.sha256()
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix='.part')
+        self.file = os.fdopen(fd, 'wb')
+
+    def write(self, data, final=False):
+        encoded = self.decoder.decode(data, final).encode('utf-8', errors='surrogatepass')
+        self.digest.update(encoded)
+        self.file.write(encoded)
+
+    def close(self):
+        self.write(b'', final=True)
+        self.file.close()
+        return self.digest.hexdigest()
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class StylesheetFetcher:
+    def __init__(self, max_bytes=MAX_STYLESHEET_BYTES, timeout=STYLESHEET_TIMEOUT,
+                 max_connections=MAX_CONCURRENT_REQUESTS, transport=None,
+                 streaming_threshold=STREAMING_THRESHOLD):
+        self.max_bytes = max_bytes
+        self.streaming_threshold = streaming_threshold
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE and transport is None,
+            follow_redirects=True,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "text/css,*/*;q=0.1",
+            },
+            transport=transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    async def fetch(self, url):
+        response = await self.fetch_response(url)
+        return response['content']
+
+    async def fetch_response(self, url, etag=None, last_modified=None, spool_dir=None):
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        result = {
+            "status": 0,
+            "content": "",
+            "path": None,
+            "content_hash": None,
+            "etag": None,
+            "last_modified": None,
+            "max_age": None,
+            "error": None,
+        }
+        spool = None
+
+        try:
+            async with self.client.stream('GET', url, headers=headers) as response:
+                result['status'] = response.status_code
+                result['etag'] = response.headers.get('etag')
+                result['last_modified'] = response.headers.get('last-modified')
+                result['max_age'] = self._max_age(response.headers.get('cache-control', ''))
+
+                if response.status_code != 200:
+                    return result
+
+                declared_size = response.headers.get('content-length', '')
+                if declared_size.isdigit() and int(declared_size) > self.max_bytes:
+                    result['error'] = "too_large"
+                    return result
+
+                encoding = response.charset_encoding or 'utf-8'
+                codecs.lookup(encoding)
+
+                body = bytearray()
+                size = 0
+
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        if spool is not None:
+                            spool.discard()
+                        result['error'] = "too_large"
+                        return result
+
+                    if spool is not None:
+                        spool.write(chunk)
+                        continue
+
+                    body.extend(chunk)
+
+                    if spool_dir is not None and len(body) > self.streaming_threshold:
+                        spool = TextSpool(spool_dir, encoding)
+                        spool.write(bytes(body))
+                        body = None
+
+                if spool is not None:
+                    result['content_hash'] = spool.close()
+                    result['path'] = spool.path
+                else:
+                    result['content'] = body.decode(encoding, errors='replace')
+
+        except (httpx.HTTPError, LookupError) as e:
+            if spool is not None:
+                spool.discard()
+                result['path'] = None
+                result['content_hash'] = None
+
+            result['error'] = classify_exception(e) if isinstance(e, httpx.HTTPError) else "bad_charset"
+        except asyncio.CancelledError:
+            # A deadline cancelled the download; the partial spool file is of no use to anyone
+            if spool is not None and result['path'] is None:
+                spool.discard()
+            raise
+
+        return result
+
+    @staticmethod
+    def _max_age(cache_control):
+        directives = [d.strip().lower() for d in cache_control.split(',')]
+
+        if 'no-cache' in directives or 'no-store' in directives:
+            return None
+
+        for directive in directives:
+            name, _, value = directive.partition('=')
+            if name == 'max-age' and value.strip().isdigit():
+                return int(value)
+
+        return None
@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+
+from results_table import ResultsTable
+
+_loaded = {}
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class UsageStats:
+    def __init__(self, table):
+        self.table = table
+        self.categories = [str(cat_name) for cat_name in table.categories]
+        self.features = [str(feature_key) for feature_key in table.features]
+
+        valid = table.valid_sites()
+        category_count = len(self.categories)
+
+        self.total_sites = table.total_sites
+        self.valid = valid
+        self.analyzed_sites = int(valid.sum())
+        self.failed_sites = self.total_sites - self.analyzed_sites
+
+        self.feature_sites = table.feature_site_counts()
+        self.category_features = table.category_feature_counts()
+        self.site_scores = table.site_feature_counts()
+        self.occurrences = table.occurrences()
+
+        self.category_sites = np.bincount(table.site_category[valid], minlength=category_count)
+        self.category_feature_totals = np.bincount(
+            table.site_category, weights=self.site_scores, minlength=category_count
+        )
+        self.category_adopters = np.bincount(
+            table.site_category[valid & (self.site_scores > 0)], minlength=category_count
+        )
+        self.adopters = int(self.category_adopters.sum())
+
+    @classmethod
+    def from_results(cls, results):
+        if isinstance(results, cls):
+            return results
+        if isinstance(results, ResultsTable):
+            return cls(results)
+        if isinstance(results, (str, os.PathLike)):
+            return cls.load(results)
+        return cls(ResultsTable.from_results(results))
+
+    @classmethod
+    def save(cls, table, path):
+        table.save(path)
+        stats = cls(table)
+
+        _loaded[os.path.realpath(path)] = (_file_key(path), stats)
+        return stats
+
+    @classmethod
+    def load(cls, path):
+        path = os.path.realpath(path)
+        key = _file_key(path)
+
+        cached = _loaded.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        if path.endswith('.npz'):
+            stats = cls(ResultsTable.load(path))
+        else:
+            stats = cls(ResultsTable.from_file(path))
+
+        _loaded[path] = (key, stats)
+        return stats
+
+    def feature_share(self, feature):
+        return self.feature_sites[feature] / self.analyzed_sites * 100 if self.analyzed_sites else 0
+
+    def category_average(self, category):
+        return self.category_feature_totals[category] / self.category_sites[category]
+
+    def category_adoption(self, category):
+        return self.category_adopters[category] / self.category_sites[category] * 100
+
+    def measured_categories(self):
+        return np.flatnonzero(self.category_sites)
+
+    def feature_index(self, feature_key):
+        return self.features.index(feature_key)
+
+    def feature_name(self, feature):
+        return self.table.feature_name(feature)
+
+    def sites_with_feature(self, feature, limit=None):
+        return self.table.site_name[self.table.sites_with_feature(feature, limit)]
+
+    def error_counts(self):
+        codes, counts = np.unique(self.table.site_error[~self.valid], return_counts=True)
+        return sorted(((str(code), int(count)) for code, count in zip(codes, counts)), key=lambda item: -item[1])
+
+    def site_name(self, site):
+        return str(self.table.site_name[site])
+
+    def site_url(self, site):
+        return str(self.table.site_url[site])
+
+    def site_error(self, site):
+        return str(self.table.site_error[site])
+
+    def site_features(self, site):
+        return [(feature, int(self.occurrences[site, feature])) for feature in np.flatnonzero(self.occurrences[site])]
+
+    def category_site_order(self):
+        table = self.table
+        order = np.argsort(table.site_category, kind='stable')
+        starts = np.searchsorted(table.site_category[order], np.arange(len(self.categories) + 1))
+
+        return [order[starts[category]:starts[category + 1]] for category in range(len(self.categories))]
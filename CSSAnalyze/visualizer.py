@@ -1,22 +1,58 @@
-import json
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-from collections import Counter, defaultdict
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from config import FEATURE_COLORS, VISUALIZATIONS_DIR
+from usage_stats import UsageStats
+from config import FEATURE_COLORS, VISUALIZATIONS_DIR, CHART_FORMAT, CHART_DPI, CHART_WORKERS
 
+CHARTS = ('create_pie_chart', 'create_bar_chart', 'create_horizontal_bar', 'create_comparison_chart')
 
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+_pyplot = None
+_worker_generator = None
+
+
+def pyplot():
+    global _pyplot
+
+    if _pyplot is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        plt.style.use('seaborn-v0_8-darkgrid')
+        sns.set_palette("husl")
+        _pyplot = plt
+
+    return _pyplot
+
+
+def format_chart_results(results):
+    lines = []
+
+    for result in results:
+        status = result['error'] or result['path'] or 'нет данных'
+        lines.append(f"{result['chart']:<26} {result['seconds']:7.2f} с  {status}")
+
+    return "\n".join(lines)
+
+
+def _init_worker(generator):
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _render_in_worker(chart):
+    return _worker_generator.render(chart)
 
 
 class CSSVisualizationGenerator:
 
-    def __init__(self, json_file_path):
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
+    def __init__(self, json_file_path, fmt=CHART_FORMAT, dpi=CHART_DPI):
+        self.stats = UsageStats.load(json_file_path)
+        self.fmt = fmt
+        self.dpi = dpi
         
         self.output_dir = VISUALIZATIONS_DIR
         os.makedirs(self.output_dir, exist_ok=True)
@@ -24,28 +60,28 @@ class CSSVisualizationGenerator:
         self.prepare_data()
     
     def prepare_data(self):
-        self.feature_stats = Counter()
-        self.category_stats = defaultdict(lambda: defaultdict(int))
-        self.site_features = {}
-        
-        for cat_name, cat_data in self.data['categories'].items():
-            for site_name, site_data in cat_data['sites'].items():
-                
-                if site_data.get('error'):
-                    continue
-                
-                site_features = set()
-                
-                for feature_key, feature_info in site_data.get('features_summary', {}).items():
-                    self.feature_stats[feature_key] += 1
-                    self.category_stats[cat_name][feature_key] += 1
-                    site_features.add(feature_key)
-                
-                self.site_features[f"{cat_name}:{site_name}"] = site_features
-        
-        self.total_sites = self.data['total_sites']
+        stats = self.stats
+        
+        self.feature_stats = {
+            stats.features[feature]: int(stats.feature_sites[feature])
+            for feature in np.flatnonzero(stats.feature_sites)
+        }
+        self.category_stats = {
+            cat_name: {
+                stats.features[feature]: int(stats.category_features[category, feature])
+                for feature in np.flatnonzero(stats.category_features[category])
+            }
+            for category, cat_name in enumerate(stats.categories)
+        }
+        self.site_scores = {
+            str(site_name): int(score)
+            for site_name, score in zip(stats.table.site_name[stats.valid], stats.site_scores[stats.valid])
+        }
+        
+        self.total_sites = stats.analyzed_sites
     
     def create_pie_chart(self):
+        plt = pyplot()
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
         
         if self.feature_stats:
@@ -72,7 +108,7 @@ class CSSVisualizationGenerator:
             ax1.text(0.5, 0.5, 'Нет данных', ha='center', va='center', fontsize=14)
             ax1.set_title('Использование CSS-технологий', fontsize=13, weight='bold')
         
-        sites_with_features = len([s for s in self.site_features.values() if s])
+        sites_with_features = self.stats.adopters
         sites_without = self.total_sites - sites_with_features
         
         if sites_with_features > 0 or sites_without > 0:
@@ -88,14 +124,10 @@ class CSSVisualizationGenerator:
                          f'({sites_with_features} из {self.total_sites} сайтов)',
                          fontsize=13, weight='bold', pad=20)
         
-        plt.tight_layout()
-        output_path = f'{self.output_dir}/pie_charts.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return output_path
+        return self._save(plt, 'pie_charts')
     
     def create_bar_chart(self):
+        plt = pyplot()
         fig, ax = plt.subplots(figsize=(14, 8))
         
         categories = list(self.category_stats.keys())
@@ -143,25 +175,15 @@ class CSSVisualizationGenerator:
         ax.legend(loc='center left', bbox_to_anchor=(1, 0.5), fontsize=10, frameon=True)
         ax.grid(axis='y', alpha=0.3)
         
-        plt.tight_layout()
-        output_path = f'{self.output_dir}/bar_chart.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return output_path
+        return self._save(plt, 'bar_chart')
     
     def create_horizontal_bar(self):
-        site_scores = {}
-        
-        for site_key, features in self.site_features.items():
-            cat_name, site_name = site_key.split(':', 1)
-            site_scores[site_name] = len(features)
-        
-        sorted_sites = sorted(site_scores.items(), key=lambda x: x[1], reverse=True)
+        sorted_sites = sorted(self.site_scores.items(), key=lambda x: x[1], reverse=True)
         
         if not sorted_sites:
             return None
         
+        plt = pyplot()
         top_sites = sorted_sites[:15]
         
         sites = [s[0] for s in top_sites]
@@ -189,29 +211,16 @@ class CSSVisualizationGenerator:
                     fontsize=14, weight='bold', pad=20)
         ax.grid(axis='x', alpha=0.3)
         
-        plt.tight_layout()
-        output_path = f'{self.output_dir}/site_ranking.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return output_path
+        return self._save(plt, 'site_ranking')
     
     def create_comparison_chart(self):
+        plt = pyplot()
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
         
-        category_avg = {}
+        stats = self.stats
+        measured = stats.measured_categories()
         
-        for cat_name, cat_data in self.data['categories'].items():
-            total_features = 0
-            valid_sites = 0
-            
-            for site_name, site_data in cat_data['sites'].items():
-                if not site_data.get('error'):
-                    total_features += site_data.get('total_features_found', 0)
-                    valid_sites += 1
-            
-            if valid_sites > 0:
-                category_avg[cat_name] = total_features / valid_sites
+        category_avg = {stats.categories[category]: stats.category_average(category) for category in measured}
         
         if category_avg:
             categories = [c.replace('_', ' ').title() for c in category_avg.keys()]
@@ -229,20 +238,7 @@ class CSSVisualizationGenerator:
                 ax1.text(bar.get_x() + bar.get_width()/2., height,
                         f'{height:.1f}', ha='center', va='bottom', fontsize=10, weight='bold')
         
-        category_adoption = {}
-        
-        for cat_name, cat_data in self.data['categories'].items():
-            sites_with_css = 0
-            total_sites = 0
-            
-            for site_name, site_data in cat_data['sites'].items():
-                if not site_data.get('error'):
-                    total_sites += 1
-                    if site_data.get('total_features_found', 0) > 0:
-                        sites_with_css += 1
-            
-            if total_sites > 0:
-                category_adoption[cat_name] = (sites_with_css / total_sites) * 100
+        category_adoption = {stats.categories[category]: stats.category_adoption(category) for category in measured}
         
         if category_adoption:
             categories = [c.replace('_', ' ').title() for c in category_adoption.keys()]
@@ -260,12 +256,7 @@ class CSSVisualizationGenerator:
                 ax2.text(bar.get_x() + bar.get_width()/2., height,
                         f'{height:.1f}%', ha='center', va='bottom', fontsize=10, weight='bold')
         
-        plt.tight_layout()
-        output_path = f'{self.output_dir}/category_comparison.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return output_path
+        return self._save(plt, 'category_comparison')
     
     def _get_feature_name(self, feature_key):
         names = {
@@ -278,31 +269,32 @@ class CSSVisualizationGenerator:
         }
         return names.get(feature_key, feature_key.replace('_', ' ').title())
     
-    def generate_all(self):
-        generated_files = []
+    def _save(self, plt, name):
+        plt.tight_layout()
+        output_path = f'{self.output_dir}/{name}.{self.fmt}'
+        plt.savefig(output_path, format=self.fmt, dpi=self.dpi, bbox_inches='tight')
+        plt.close()
         
-        try:
-            file = self.create_pie_chart()
-            if file: generated_files.append(file)
-        except Exception:
-            pass
+        return output_path
+    
+    def render(self, chart):
+        started = time.perf_counter()
+        result = {"chart": chart, "path": None, "seconds": 0.0, "error": None}
         
         try:
-            file = self.create_bar_chart()
-            if file: generated_files.append(file)
-        except Exception:
-            pass
+            result['path'] = getattr(self, chart)()
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+            pyplot().close('all')
         
-        try:
-            file = self.create_horizontal_bar()
-            if file: generated_files.append(file)
-        except Exception:
-            pass
+        result['seconds'] = time.perf_counter() - started
+        return result
+    
+    def generate_all(self, workers=CHART_WORKERS):
+        workers = min(len(CHARTS), workers or os.cpu_count() or 1)
         
-        try:
-            file = self.create_comparison_chart()
-            if file: generated_files.append(file)
-        except Exception:
-            pass
+        if workers == 1:
+            return [self.render(chart) for chart in CHARTS]
         
-        return generated_files
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self,)) as executor:
+            return list(executor.map(_render_in_worker, CHARTS))
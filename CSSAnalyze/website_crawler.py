@@ -1,124 +1,464 @@
 import asyncio
+import os
+import tempfile
+import time
 from crawl4ai import AsyncWebCrawler
 from css_analyzer import CSSAnalyzer
-from config import WEBSITES, CSS_FEATURES
+from crawl_scheduler import CrawlScheduler
+from stylesheet_fetcher import StylesheetFetcher
+from stylesheet_cache import StylesheetCache, content_hash, stylesheet_set_fingerprint
+from analysis_pipeline import AnalysisPipeline
+from crawl_trace import Tracer, NULL_TRACER
+from crawl_errors import CrawlError, classify_message, classify_exception, error_fields
+from host_health import HostHealth
+from style_extractor import import_urls, IMPORT_SCAN_CHARS
+from site_summary import empty_site_results, summarize_features, assemble_results
+from config import (WEBSITES, MAX_STYLESHEETS_PER_SITE, MAX_IMPORT_DEPTH, ANALYSIS_MODE, MAX_CONCURRENT_REQUESTS,
+                    SITE_DEADLINE, STYLESHEET_DEADLINE, PAGE_TIMEOUT)
+
+
+def without_timings(analysis):
+    return {key: value for key, value in analysis.items() if key != 'timings'}
 
 
 class WebsiteCSSCrawler:
-    def __init__(self):
-        self.css_analyzer = CSSAnalyzer()
+    def __init__(self, use_cache=True, workers=None, mode=ANALYSIS_MODE, trace=False, previous=None):
+        self.mode = mode
+        self.css_analyzer = CSSAnalyzer(mode)
+        self.scheduler = CrawlScheduler()
+        self.health = HostHealth()
+        self.pipeline = AnalysisPipeline(workers, mode=mode, timed=trace)
+        self.tracer = Tracer() if trace else NULL_TRACER
+        self.cache = StylesheetCache(mode=mode, samples=self.pipeline.samples) if use_cache else None
+        self.previous = previous
+        self.in_flight = {}
         self.results = {}
     
-    async def fetch_css_file(self, crawler, url):
-        try:
-            result = await crawler.arun(
-                url=url,
-                bypass_cache=True,
-                word_count_threshold=1
+    async def fetch_css_file(self, fetcher, url):
+        if self.cache is None:
+            async with self.scheduler.slot(url) as waited:
+                self._rate_limit_wait(waited, url)
+                response = await fetcher.fetch_response(url, spool_dir=tempfile.gettempdir())
+            
+            self._check_response(response, url)
+            return self._stylesheet(response, temporary=True)
+        
+        cached = self.cache.lookup(url)
+        
+        if cached and self.cache.is_fresh(cached):
+            stylesheet = self.cache.open_stylesheet(cached['content_hash'])
+            if stylesheet is not None:
+                return stylesheet
+        
+        async with self.scheduler.slot(url) as waited:
+            self._rate_limit_wait(waited, url)
+            response = await fetcher.fetch_response(
+                url,
+                etag=cached and cached.get('etag'),
+                last_modified=cached and cached.get('last_modified'),
+                spool_dir=self.cache.spool_dir
             )
+        
+        self._check_response(response, url)
+        
+        if response['status'] == 304 and cached:
+            stylesheet = self.cache.open_stylesheet(cached['content_hash'])
+            if stylesheet is not None:
+                self.cache.refresh(cached, response['etag'], response['last_modified'], response['max_age'])
+                return stylesheet
             
-            if result.success:
-                return result.html
+            async with self.scheduler.slot(url) as waited:
+                self._rate_limit_wait(waited, url)
+                response = await fetcher.fetch_response(url, spool_dir=self.cache.spool_dir)
             
-        except Exception:
-            pass
-        
-        return ""
-    
-    async def analyze_website(self, crawler, name, url):
-        site_results = {
-            "name": name,
-            "url": url,
-            "inline_css": {},
-            "external_css": [],
-            "features_summary": {},
-            "total_features_found": 0
+            self._check_response(response, url)
+        
+        if response['path']:
+            response['path'] = self.cache.store_file(
+                url,
+                response['path'],
+                response['content_hash'],
+                response['etag'],
+                response['last_modified'],
+                response['max_age']
+            )
+        elif response['content']:
+            response['content_hash'] = self.cache.store(
+                url,
+                response['content'],
+                response['etag'],
+                response['last_modified'],
+                response['max_age']
+            )
+        
+        return self._stylesheet(response)
+    
+    def _rate_limit_wait(self, waited, url):
+        if self.tracer.enabled and waited > 0.001:
+            now = time.perf_counter()
+            self.tracer.add('rate_limit_wait', now - waited, now, url=url)
+    
+    @staticmethod
+    def _check_response(response, url):
+        """Failed downloads as CrawlErrors, so transient ones are retried and all of them are reported."""
+        if response['error']:
+            raise CrawlError(response['error'], url)
+        if response['status'] == 429 or response['status'] >= 500:
+            raise CrawlError("server_error", f"HTTP {response['status']}: {url}")
+        if response['status'] >= 400:
+            raise CrawlError("http_error", f"HTTP {response['status']}: {url}")
+    
+    @staticmethod
+    def _stylesheet(response, temporary=False):
+        if not response['content'] and not response['path']:
+            return None
+        
+        return {
+            "content": response['content'] or None,
+            "path": response['path'],
+            "content_hash": response['content_hash'],
+            "temporary": temporary and response['path'] is not None,
         }
+    
+    async def run_analysis(self, stylesheet, source_url):
+        if stylesheet['content'] is not None:
+            return await self.pipeline.analyze(stylesheet['content'], source_url)
         
         try:
-            result = await crawler.arun(
-                url=url,
-                bypass_cache=True,
-                word_count_threshold=10,
-                exclude_external_links=True
-            )
-            
-            if not result.success:
-                site_results['error'] = result.error_message
-                return site_results
-            
-            inline_css = self.css_analyzer.extract_inline_styles(result.html)
-            
-            if inline_css:
-                inline_analysis = self.css_analyzer.analyze_css(inline_css, f"{url} (inline)")
-                site_results['inline_css'] = inline_analysis
-            
-            css_links = self.css_analyzer.extract_css_links(result.html, url)
-            
-            for css_url in css_links:
-                css_content = await self.fetch_css_file(crawler, css_url)
-                
-                if css_content:
-                    css_analysis = self.css_analyzer.analyze_css(css_content, css_url)
-                    site_results['external_css'].append(css_analysis)
-                
-                await asyncio.sleep(0.5)
+            return await self.pipeline.analyze_file(stylesheet['path'], source_url)
+        finally:
+            if stylesheet.get('temporary'):
+                os.remove(stylesheet['path'])
+    
+    async def analyze_stylesheet(self, stylesheet, source_url):
+        if self.cache is None:
+            return await self.run_analysis(stylesheet, source_url)
+        
+        digest = stylesheet.get('content_hash') or content_hash(stylesheet['content'])
+        analysis = self.cache.get_analysis(digest, source_url)
+        
+        if analysis is not None:
+            return analysis
+        
+        shared = self.in_flight.get(digest)
+        while shared is not None:
+            try:
+                analysis = await asyncio.shield(shared)
+                return {**analysis, "source": source_url}
+            except asyncio.CancelledError:
+                # The site that started this analysis ran out of time; another waiter may already have taken over
+                if not shared.cancelled():
+                    raise
+            shared = self.in_flight.get(digest)
+        
+        future = self.in_flight[digest] = asyncio.get_running_loop().create_future()
+        
+        try:
+            analysis = await self.run_analysis(stylesheet, source_url)
+            self.cache.store_analysis(digest, analysis)
+            future.set_result(analysis)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if self.in_flight.get(digest) is future:
+                del self.in_flight[digest]
+        
+        return analysis
+    
+    async def fetch_stylesheets(self, fetcher, css_urls, limit, seen, depth=0, pipelined=False):
+        css_urls = [css_url for css_url in dict.fromkeys(css_urls) if css_url not in seen]
+        seen.update(dict.fromkeys(css_urls))
+        
+        fetched = await asyncio.gather(*[
+            self.fetch_stylesheet(fetcher, css_url, limit, seen, depth, pipelined)
+            for css_url in css_urls
+        ])
+        
+        return [entry for entries in fetched for entry in entries]
+    
+    async def fetch_stylesheet(self, fetcher, css_url, limit, seen, depth=0, pipelined=False):
+        """Entries of a stylesheet and its imports. Pipelined, each one is analyzed as soon as it arrives
+        and keeps only its content hash; otherwise the bodies wait for the fingerprint check."""
+        error = None
+        
+        async with limit:
+            started = time.perf_counter()
             
-            all_features = set()
+            try:
+                stylesheet, _ = await asyncio.wait_for(
+                    self.health.call(css_url, lambda: self.fetch_css_file(fetcher, css_url)),
+                    STYLESHEET_DEADLINE
+                )
+            except asyncio.TimeoutError:
+                stylesheet, error = None, "stylesheet_timeout"
+            except CrawlError as e:
+                stylesheet, error = None, e.code
             
-            if site_results['inline_css'].get('features'):
-                all_features.update(site_results['inline_css']['features'].keys())
+            fetched = time.perf_counter()
+        
+        size = self._stylesheet_bytes(stylesheet) if self.tracer.enabled else 0
+        self.tracer.add('fetch', started, fetched, url=css_url, bytes=size)
+        
+        entry = {"url": css_url, "stylesheet": stylesheet, "fetch_seconds": fetched - started, "bytes": size,
+                 "error": error}
+        # Kept by URL so a site that runs out of time can still remove what it spooled
+        seen[css_url] = entry
+        
+        if not stylesheet:
+            return [entry]
+        
+        # Read before the analysis, which removes temporary files
+        imports = import_urls(self._stylesheet_head(stylesheet), css_url) if depth < MAX_IMPORT_DEPTH else []
+        
+        if not pipelined:
+            return [entry, *await self.fetch_stylesheets(fetcher, imports, limit, seen, depth + 1)]
+        
+        self.hash_stylesheet(stylesheet)
+        entry['analysis'], imported = await asyncio.gather(
+            self.analyze_fetched(entry),
+            self.fetch_stylesheets(fetcher, imports, limit, seen, depth + 1, pipelined)
+        )
+        entry['content_hash'], entry['stylesheet'] = stylesheet['content_hash'], None
+        return [entry, *imported]
+    
+    async def analyze_fetched(self, entry):
+        if not self.tracer.enabled:
+            return await self.analyze_stylesheet(entry['stylesheet'], entry['url'])
+        
+        analysis = await self.traced_analysis(entry['stylesheet'], entry['url'])
+        analysis['timings'] = {
+            **analysis['timings'],
+            "fetch_seconds": entry['fetch_seconds'],
+            "bytes_fetched": entry['bytes'],
+        }
+        return analysis
+    
+    @staticmethod
+    def hash_stylesheet(stylesheet):
+        if not stylesheet.get('content_hash'):
+            stylesheet['content_hash'] = content_hash(stylesheet['content'])
+        return stylesheet['content_hash']
+    
+    @classmethod
+    def fingerprint(cls, inline_css, fetched, mode, samples):
+        stylesheets = []
+        
+        for entry in fetched:
+            stylesheet = entry['stylesheet']
+            digest = cls.hash_stylesheet(stylesheet) if stylesheet else entry.get('content_hash')
+            stylesheets.append((entry['url'], digest))
+        
+        return stylesheet_set_fingerprint(inline_css, stylesheets, mode, samples)
+    
+    @staticmethod
+    def reuse(site_results, previous):
+        site_results.update({
+            key: previous[key] for key in ('inline_css', 'external_css', 'features_summary', 'total_features_found')
+        })
+        
+        # Timings belong to the run that measured them
+        site_results['inline_css'] = without_timings(site_results['inline_css'])
+        site_results['external_css'] = [without_timings(css_file) for css_file in site_results['external_css']]
+        site_results['unchanged'] = True
+        return site_results
+    
+    @staticmethod
+    def record_stylesheet_errors(site_results, fetched):
+        stylesheet_errors = [{"url": entry['url'], "error": entry['error']} for entry in fetched if entry['error']]
+        if stylesheet_errors:
+            site_results['stylesheet_errors'] = stylesheet_errors
+    
+    async def analyze_inline(self, inline_css, url):
+        if not inline_css:
+            return None
+        
+        inline_stylesheet = {"content": inline_css, "path": None, "content_hash": None}
+        analyze = self.traced_analysis if self.tracer.enabled else self.analyze_stylesheet
+        return await analyze(inline_stylesheet, f"{url} (inline)")
+    
+    @staticmethod
+    def discard(fetched):
+        for entry in fetched:
+            stylesheet = entry and entry['stylesheet']
+            if stylesheet and stylesheet.get('temporary') and os.path.exists(stylesheet['path']):
+                os.remove(stylesheet['path'])
+    
+    async def traced_analysis(self, stylesheet, source_url):
+        with self.tracer.span('analysis', url=source_url):
+            analysis = await self.analyze_stylesheet(stylesheet, source_url)
+        
+        # Cached analyses carry no timings of their own
+        timings = analysis.get('timings', {})
+        queue_wait = timings.get('queue_wait_seconds', 0.0)
+        
+        if queue_wait:
+            now = time.perf_counter()
+            self.tracer.add('queue_wait', now - queue_wait, now, url=source_url)
+        
+        for pattern, seconds in timings.get('patterns', {}).items():
+            self.tracer.count(pattern, seconds)
+        
+        return {**analysis, "timings": {"analysis_seconds": 0.0, "queue_wait_seconds": 0.0, **timings}}
+    
+    @staticmethod
+    def _stylesheet_bytes(stylesheet):
+        if not stylesheet:
+            return 0
+        if stylesheet['content'] is not None:
+            return len(stylesheet['content'].encode('utf-8', errors='surrogatepass'))
+        return os.path.getsize(stylesheet['path'])
+    
+    @staticmethod
+    def _stylesheet_head(stylesheet):
+        if stylesheet['content'] is not None:
+            return stylesheet['content'][:IMPORT_SCAN_CHARS]
+        
+        with open(stylesheet['path'], 'r', encoding='utf-8', errors='replace') as f:
+            return f.read(IMPORT_SCAN_CHARS)
+    
+    def _site_timings(self, site_results, started, page_seconds):
+        stylesheets = list(site_results['external_css'])
+        if site_results['inline_css']:
+            stylesheets.append(site_results['inline_css'])
+        
+        timings = [stylesheet.get('timings', {}) for stylesheet in stylesheets]
+        
+        return {
+            "seconds": time.perf_counter() - started,
+            "page_seconds": page_seconds,
+            "stylesheets": len(site_results['external_css']),
+            "bytes_fetched": sum(timing.get('bytes_fetched', 0) for timing in timings),
+            "fetch_seconds": sum(timing.get('fetch_seconds', 0.0) for timing in timings),
+            "queue_wait_seconds": sum(timing.get('queue_wait_seconds', 0.0) for timing in timings),
+            "analysis_seconds": sum(timing.get('analysis_seconds', 0.0) for timing in timings),
+        }
+    
+    async def load_page(self, crawler, url, progress):
+        await self.health.preflight(url)
+        
+        async with self.scheduler.slot(url) as waited:
+            self._rate_limit_wait(waited, url)
             
-            for css_file in site_results['external_css']:
-                if css_file.get('features'):
-                    all_features.update(css_file['features'].keys())
+            with self.tracer.span('page', url=url):
+                page_started = time.perf_counter()
+                try:
+                    result = await crawler.arun(
+                        url=url,
+                        bypass_cache=True,
+                        word_count_threshold=10,
+                        exclude_external_links=True,
+                        page_timeout=int(PAGE_TIMEOUT * 1000)
+                    )
+                finally:
+                    progress['page_seconds'] += time.perf_counter() - page_started
+        
+        if not result.success:
+            raise CrawlError(classify_message(result.error_message), result.error_message or '')
+        
+        return result
+    
+    async def crawl_site(self, crawler, fetcher, site_results, progress):
+        url = site_results['url']
+        result, attempts = await self.health.call(url, lambda: self.load_page(crawler, url, progress))
+        
+        if attempts > 1:
+            site_results['attempts'] = attempts
+        
+        inline_css, css_links = self.css_analyzer.extract_styles(result.html, url)
+        limit = asyncio.Semaphore(MAX_STYLESHEETS_PER_SITE)
+        
+        previous_fingerprint = self.previous and self.previous.fingerprint(url)
+        
+        if previous_fingerprint:
+            # Bodies are held until the fingerprint shows whether the previous result can be reused
+            fetched = await self.fetch_stylesheets(fetcher, css_links, limit, progress['stylesheets'])
+            self.record_stylesheet_errors(site_results, fetched)
+            site_results['fingerprint'] = self.fingerprint(inline_css, fetched, self.mode, self.pipeline.samples)
             
-            for feature_key in all_features:
-                feature_name = CSS_FEATURES[feature_key]['name']
-                total_count = 0
-                
-                if site_results['inline_css'].get('features', {}).get(feature_key):
-                    total_count += site_results['inline_css']['features'][feature_key]['count']
-                
-                for css_file in site_results['external_css']:
-                    if css_file.get('features', {}).get(feature_key):
-                        total_count += css_file['features'][feature_key]['count']
-                
-                site_results['features_summary'][feature_key] = {
-                    "name": feature_name,
-                    "total_occurrences": total_count,
-                    "description": CSS_FEATURES[feature_key]['description']
-                }
+            if previous_fingerprint == site_results['fingerprint']:
+                self.discard(fetched)
+                return self.reuse(site_results, self.previous.get(url))
             
-            site_results['total_features_found'] = len(all_features)
+            inline_analysis, external_css = await asyncio.gather(
+                self.analyze_inline(inline_css, url),
+                asyncio.gather(*[self.analyze_fetched(entry) for entry in fetched if entry['stylesheet']])
+            )
+        else:
+            inline_analysis, fetched = await asyncio.gather(
+                self.analyze_inline(inline_css, url),
+                self.fetch_stylesheets(fetcher, css_links, limit, progress['stylesheets'], pipelined=True)
+            )
+            self.record_stylesheet_errors(site_results, fetched)
+            site_results['fingerprint'] = self.fingerprint(inline_css, fetched, self.mode, self.pipeline.samples)
+            external_css = [entry['analysis'] for entry in fetched if 'analysis' in entry]
+        
+        if inline_analysis is not None:
+            site_results['inline_css'] = inline_analysis
+        site_results['external_css'] = list(external_css)
+        
+        return summarize_features(site_results)
+    
+    async def analyze_website(self, crawler, fetcher, name, url):
+        site_results = empty_site_results(name, url)
+        started = time.perf_counter()
+        progress = {"page_seconds": 0.0, "stylesheets": {}}
+        
+        try:
+            await asyncio.wait_for(self.crawl_site(crawler, fetcher, site_results, progress), SITE_DEADLINE)
+        
+        except asyncio.TimeoutError:
+            self.discard(progress['stylesheets'].values())
+            site_results.update(error_fields("site_timeout"))
+        
+        except CrawlError as e:
+            site_results.update(error_fields(e.code, str(e)))
+            if getattr(e, 'attempts', 1) > 1:
+                site_results['attempts'] = e.attempts
         
         except Exception as e:
-            site_results['error'] = str(e)
+            site_results.update(error_fields(classify_exception(e), f"{type(e).__name__}: {e}"))
+        
+        finally:
+            if self.tracer.enabled:
+                site_results['timings'] = self._site_timings(site_results, started, progress['page_seconds'])
+                self.tracer.add('site', started, time.perf_counter(), site=name, url=url)
         
         return site_results
     
-    async def analyze_all_websites(self):
-        results = {
-            "total_sites": 0,
-            "categories": {}
-        }
-        
-        async with AsyncWebCrawler(verbose=False) as crawler:
+    async def crawl_pending(self, crawler, fetcher, pending, store):
+        for cat_name, site_name, site_url in pending:
+            store(cat_name, site_name, await self.analyze_website(crawler, fetcher, site_name, site_url))
+    
+    async def crawl_all(self, crawler, fetcher, pending, store):
+        # A fixed set of workers pulls sites from one iterator, so only the sites in progress are held
+        # in memory, and a site's SITE_DEADLINE starts when a worker takes it, not while it waits its turn
+        await asyncio.gather(*[
+            self.crawl_pending(crawler, fetcher, pending, store)
+            for _ in range(MAX_CONCURRENT_REQUESTS)
+        ])
+    
+    async def analyze_all_websites(self, journal=None, websites=WEBSITES):
+        async with AsyncWebCrawler(verbose=False) as crawler, StylesheetFetcher() as fetcher, self.pipeline:
+            
+            if journal is not None:
+                # Finished sites live in the journal
+                await self.crawl_all(crawler, fetcher, journal.pending(websites), journal.append)
+                return journal
+            
+            results = {}
+            pending = (
+                (cat_name, site_name, site_url)
+                for cat_name, category_sites in websites.items()
+                for site_name, site_url in category_sites.items()
+            )
+            
+            def store(cat_name, site_name, site_results):
+                results[(cat_name, site_name)] = site_results
             
-            for cat_name, websites in WEBSITES.items():
-                
-                category_results = {
-                    "total_sites": len(websites),
-                    "sites": {}
-                }
-                
-                for site_name, site_url in websites.items():
-                    site_result = await self.analyze_website(crawler, site_name, site_url)
-                    category_results['sites'][site_name] = site_result
-                    results['total_sites'] += 1
-                    
-                    await asyncio.sleep(1)
-                
-                results['categories'][cat_name] = category_results
-        
-        return results
+            await self.crawl_all(crawler, fetcher, pending, store)
+        
+        return assemble_results(lambda cat_name, site_name: results[(cat_name, site_name)], websites)
@@ -1,9 +1,53 @@
 from pathlib import Path
 
 BASE_PATH = Path(__file__).parent
+OUTPUT_SITES = BASE_PATH / "css_usage_sites.jsonl"
 OUTPUT_JSON = f"{BASE_PATH}css_usage_analysis.json"
 OUTPUT_TXT = f"{BASE_PATH}css_usage_report.txt"
+OUTPUT_TABLE = BASE_PATH / "css_usage_table.npz"
+OUTPUT_DELTA = BASE_PATH / "css_usage_delta.txt"
 VISUALIZATIONS_DIR = f"{BASE_PATH}css_visualizations"
+CHART_FORMAT = "png"
+CHART_DPI = 300
+CHART_WORKERS = None
+
+MAX_CONCURRENT_REQUESTS = 8
+MAX_CONCURRENT_PER_HOST = 2
+HOST_REQUESTS_PER_SECOND = 2.0
+HOST_BURST = 4
+MAX_STYLESHEETS_PER_SITE = 6
+MAX_IMPORT_DEPTH = 4
+
+USER_AGENT = "Mozilla/5.0 (compatible; CSSAnalyzer/1.0)"
+STYLESHEET_TIMEOUT = 30.0
+STYLESHEET_DEADLINE = 60.0
+PAGE_TIMEOUT = 45.0
+SITE_DEADLINE = 180.0
+PREFLIGHT_TIMEOUT = 5.0
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 15.0
+CIRCUIT_FAILURES = 3
+CIRCUIT_COOLDOWN = 120.0
+MAX_STYLESHEET_BYTES = 64 * 1024 * 1024
+
+STREAMING_THRESHOLD = 8 * 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_OVERLAP = 64 * 1024
+BATCH_CHARS = 256 * 1024
+# Matches kept with line and context per feature; the count always covers all of them
+INSTANCE_SAMPLES = 5
+
+ANALYSIS_MODE = "regex"
+ANALYSIS_WORKERS = None
+ANALYSIS_QUEUE_SIZE = 32
+
+CRAWL_JOURNAL = BASE_PATH / "css_crawl_journal.jsonl"
+MERGED_JOURNAL = BASE_PATH / "css_crawl_journal.merged.jsonl"
+HISTORY_DIR = BASE_PATH / "css_history"
+
+CACHE_DIR = BASE_PATH / ".css_cache"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
 
 WEBSITES = {
     "universities": {
@@ -37,6 +81,10 @@ CSS_FEATURES = {
             r'container-name:\s*[\w-]+',
             r'container:\s*[\w\s/]+',
         ],
+        "tokens": {
+            "at_rules": ["container"],
+            "properties": {"container-type": None, "container-name": None, "container": None},
+        },
         "description": "Адаптивность на уровне компонентов",
     },
     
@@ -47,6 +95,13 @@ CSS_FEATURES = {
             r'grid-template-rows:\s*subgrid',
             r'grid-template:\s*subgrid',
         ],
+        "tokens": {
+            "properties": {
+                "grid-template-columns": "subgrid",
+                "grid-template-rows": "subgrid",
+                "grid-template": "subgrid",
+            },
+        },
         "description": "Вложенные grid-сетки",
     },
     
@@ -58,6 +113,9 @@ CSS_FEATURES = {
             r'&\s*>\s*\w+',
             r'&\s*\.\w+',
         ],
+        "tokens": {
+            "nesting": True,
+        },
         "description": "Нативная вложенность селекторов",
     },
     
@@ -67,6 +125,9 @@ CSS_FEATURES = {
             r'@layer\s+[\w-]+',
             r'@layer\s*\{',
         ],
+        "tokens": {
+            "at_rules": ["layer"],
+        },
         "description": "Управление каскадом через слои",
     },
     
@@ -75,6 +136,9 @@ CSS_FEATURES = {
         "patterns": [
             r':has\(',
         ],
+        "tokens": {
+            "pseudo_classes": ["has"],
+        },
         "description": "Родительский селектор",
     },
     
@@ -87,6 +151,9 @@ CSS_FEATURES = {
             r'lab\(',
             r'color\(',
         ],
+        "tokens": {
+            "functions": ["oklch", "oklab", "lch", "lab", "color"],
+        },
         "description": "Современные цветовые функции",
     }
 }
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules import each other and config.py by plain name, as when run from CSSAnalyze/
+for path in (ROOT, os.path.join(ROOT, 'CSSAnalyze')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
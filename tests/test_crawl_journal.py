@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+from crawl_errors import error_fields
+from crawl_journal import CrawlJournal
+from crawl_shards import merge_shards, shard_websites
+from results_file import export_json, read_results, write_json, write_sites
+from site_summary import assemble_results, empty_site_results
+
+WEBSITES = {
+    'вузы': {f'Вуз {i}': f'https://uni-{i}.test' for i in range(7)},
+    'shops': {f'shop-{i}': f'https://shop-{i}.test/' for i in range(5)},
+    'empty': {},
+}
+
+
+def site_result(site_name, site_url, failed=False):
+    result = empty_site_results(site_name, site_url)
+
+    if failed:
+        result.update(error_fields('page_timeout', 'Timeout 45000ms exceeded'))
+    else:
+        result['inline_css'] = {"source": f"{site_url} (inline)", "total_lines": 3, "total_chars": 40,
+                                "features": {"has_selector": {"name": ":has()", "count": 2, "instances": []}}}
+        result['features_summary'] = {"has_selector": {"name": ":has()", "total_occurrences": 2}}
+        result['total_features_found'] = 1
+
+    return result
+
+
+def all_sites(websites=WEBSITES):
+    for cat_name, category_sites in websites.items():
+        for site_name, site_url in category_sites.items():
+            yield cat_name, site_name, site_url
+
+
+def crawl(path, websites=WEBSITES, failed=()):
+    with CrawlJournal(path, resume=False) as journal:
+        for cat_name, site_name, site_url in all_sites(websites):
+            journal.append(cat_name, site_name, site_result(site_name, site_url, site_name in failed))
+
+    return path
+
+
+@pytest.fixture
+def results():
+    return assemble_results(
+        lambda cat_name, site_name: site_result(site_name, WEBSITES[cat_name][site_name], site_name == 'shop-1'),
+        WEBSITES
+    )
+
+
+def test_streamed_json_is_byte_identical_to_json_dump(tmp_path, results):
+    path = tmp_path / 'results.json'
+    sites = ((cat_name, site_name, result) for cat_name, cat_data in results['categories'].items()
+             for site_name, result in cat_data['sites'].items())
+
+    write_json(str(path), sites, {cat_name: len(category_sites) for cat_name, category_sites in WEBSITES.items()})
+
+    assert path.read_text(encoding='utf-8') == json.dumps(results, ensure_ascii=False, indent=2)
+
+
+def test_journal_exports_match_the_results(tmp_path, results):
+    journal_path = crawl(str(tmp_path / 'journal.jsonl'), failed={'shop-1'})
+
+    with CrawlJournal(journal_path) as journal:
+        journal.export(str(tmp_path / 'results.json'), WEBSITES)
+        journal.export_sites(str(tmp_path / 'sites.jsonl'), WEBSITES)
+
+    export_json(str(tmp_path / 'sites.jsonl'), str(tmp_path / 'exported.json'))
+    expected = json.dumps(results, ensure_ascii=False, indent=2)
+
+    assert (tmp_path / 'results.json').read_text(encoding='utf-8') == expected
+    assert (tmp_path / 'exported.json').read_text(encoding='utf-8') == expected
+
+    total_sites, sites = read_results(str(tmp_path / 'sites.jsonl'))
+    assert total_sites == 12
+    assert [(cat_name, site_name) for cat_name, site_name, _ in sites] == \
+        [(cat_name, site_name) for cat_name, site_name, _ in all_sites()]
+
+
+def test_merged_shards_are_byte_identical_to_a_single_crawl(tmp_path):
+    single = crawl(str(tmp_path / 'single.jsonl'))
+    with CrawlJournal(single) as journal:
+        journal.export_sites(str(tmp_path / 'single-sites.jsonl'), WEBSITES)
+        journal.export(str(tmp_path / 'single.json'), WEBSITES)
+
+    # Shards write in their own order; a failed attempt in one file must not hide the success in another
+    shards = [crawl(str(tmp_path / f'shard-{index}.jsonl'), shard_websites(WEBSITES, index, 3)) for index in (1, 2, 3)]
+    retried = crawl(str(tmp_path / 'failed.jsonl'), {'shops': {'shop-2': WEBSITES['shops']['shop-2']}}, {'shop-2'})
+
+    missing = merge_shards(shards[::-1] + [retried], str(tmp_path / 'merged-sites.jsonl'), WEBSITES,
+                           str(tmp_path / 'merged.jsonl'), str(tmp_path / 'merged.json'))
+
+    assert missing == []
+    assert (tmp_path / 'merged-sites.jsonl').read_bytes() == (tmp_path / 'single-sites.jsonl').read_bytes()
+    assert (tmp_path / 'merged.json').read_bytes() == (tmp_path / 'single.json').read_bytes()
+
+
+def test_missing_sites_are_reported_and_exported_as_errors(tmp_path):
+    shard = crawl(str(tmp_path / 'shard-1.jsonl'), shard_websites(WEBSITES, 1, 2))
+
+    missing = merge_shards([shard], str(tmp_path / 'sites.jsonl'), WEBSITES, str(tmp_path / 'merged.jsonl'))
+    expected = [(cat_name, site_name) for cat_name, category_sites in shard_websites(WEBSITES, 2, 2).items()
+                for site_name in category_sites]
+
+    assert missing == expected
+    _, sites = read_results(str(tmp_path / 'sites.jsonl'))
+    errors = {site_name: result.get('error') for _, site_name, result in sites}
+    assert {site_name for site_name, error in errors.items() if error == 'missing_result'} == \
+        {site_name for _, site_name in expected}
+
+
+def test_resume_keeps_finished_sites_and_retries_failures(tmp_path):
+    path = crawl(str(tmp_path / 'journal.jsonl'), failed={'Вуз 3', 'shop-0'})
+
+    with CrawlJournal(path) as journal:
+        assert [site_name for _, site_name, _ in journal.pending(WEBSITES)] == ['Вуз 3', 'shop-0']
+        journal.append('shops', 'shop-0', site_result('shop-0', WEBSITES['shops']['shop-0']))
+
+    with CrawlJournal(path) as journal:
+        assert [site_name for _, site_name, _ in journal.pending(WEBSITES)] == ['Вуз 3']
+        assert 'error' not in journal.result('shops', 'shop-0')
+
+
+def test_sites_file_round_trip(tmp_path, results):
+    sites = list(all_sites())
+    path = str(tmp_path / 'sites.jsonl')
+
+    write_sites(path, ((cat_name, site_name, results['categories'][cat_name]['sites'][site_name])
+                       for cat_name, site_name, _ in sites), WEBSITES)
+
+    total_sites, read = read_results(path)
+    assert total_sites == results['total_sites']
+    assert [result for _, _, result in read] == \
+        [results['categories'][cat_name]['sites'][site_name] for cat_name, site_name, _ in sites]
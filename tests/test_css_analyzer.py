@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from css_analyzer import CSSAnalyzer, CSSStreamAnalyzer
+
+MODES = ('regex', 'tokens')
+
+RULES = [
+    '.card:has(>img){display:grid;gap:8px}',
+    '.title{color:color(display-p3 1 0 0)}',
+    '@container sidebar (min-width:400px){.card{display:flex}}',
+    '.grid>.item{display:grid;grid-template-columns:subgrid}',
+    '.menu{color:#333;&:hover{color:#000}& .icon{width:16px}}',
+    '@layer base,components;@layer base{html{color:#111}}',
+    '.nav a{margin:0 auto;font:14px/1.4 "Helvetica Neue",sans-serif}',
+    '/* .old:has(x) */.panel{border:1px solid #ddd}',
+]
+
+# Pieces that put chunk boundaries inside comments, strings, escapes and url()
+STREAM_PIECES = [
+    '/*', '*/', '"', "'", '\\', 'url(', 'url(data:abc', ')', '\n', ' ', '{', '}', ';', 'a', 'x' * 50,
+    ':has(', ':is(', '&', '@container', '@layer x', 'display:grid;', 'gap:4px;', 'aspect-ratio:1;',
+    'container-type:inline-size;', 'color:red;',
+]
+
+# Tokens mode only counts real syntax: nothing in comments, strings or url(), no lab( inside oklab(
+TOKEN_FIXTURES = {
+    'comment': ('/* .a:has(b) display:grid @container */ a{color:red}', {}),
+    'string': ('a::before{content:":has( @layer x; display:grid"}', {}),
+    'url': ('a{background:url(img/:has(x).png)} b{background:url("@container.svg")}', {}),
+    'oklab': ('a{color:oklab(50% 0.1 0.1)}', {'color_functions': 1}),
+    'lab': ('a{color:lab(50% 40 59)}', {'color_functions': 1}),
+    'features': (
+        '.card:has(img){display:grid}@container sidebar (min-width:400px){.x{color:red}}'
+        '@layer base{a{b:c}}.m{&:hover{c:d}}',
+        {'container_queries': 1, 'css_nesting': 1, 'css_layers': 1, 'has_selector': 1},
+    ),
+}
+
+
+def synthetic_css(size, pretty=False, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+
+    while total < size:
+        rule = rng.choice(RULES)
+        if pretty:
+            rule = rule.replace('{', ' {\n  ').replace(';', ';\n  ').replace('}', '\n}\n')
+
+        parts.append(rule)
+        total += len(rule)
+
+    return ''.join(parts)[:size]
+
+
+def stream_cases(fragments=100, seed=0):
+    rng = random.Random(seed)
+    yield 'open_comment', 'a{color:red}/*' + ' x:has( ' * 10000 + '*/b:has(c){}'
+    yield 'open_string', 'a{content:"' + ' :has( ' * 10000 + '"}b:has(c){}'
+    yield 'minified', synthetic_css(256 * 1024, seed=seed)
+    yield 'pretty', synthetic_css(256 * 1024, pretty=True, seed=seed)
+
+    for i in range(fragments):
+        yield f'fragment_{i}', ''.join(rng.choice(STREAM_PIECES) for _ in range(rng.randint(1, 600)))
+
+
+def counts(analysis):
+    return {key: feature['count'] for key, feature in analysis['features'].items() if feature['count']}
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('name, css', list(stream_cases()), ids=[name for name, _ in stream_cases()])
+def test_streamed_analysis_matches_in_memory(mode, name, css):
+    analyzer = CSSAnalyzer(mode)
+    expected = analyzer.analyze_css(css, 'synthetic.css')
+
+    for chunk_size in (7, 64, 1024):
+        if len(css) > 64 * 1024 and chunk_size < 1024:
+            continue
+
+        # No overlap beyond the instance context, so chunk boundaries land everywhere
+        stream = CSSStreamAnalyzer(analyzer.matcher, 'synthetic.css', overlap=0, samples=analyzer.samples)
+        for start in range(0, len(css), chunk_size):
+            stream.feed(css[start:start + chunk_size])
+
+        assert stream.close() == expected, f"chunk_size={chunk_size}"
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_file_analysis_matches_in_memory(tmp_path, mode):
+    analyzer = CSSAnalyzer(mode)
+    css = synthetic_css(200 * 1024, pretty=True) + 'a{content:"\n:has(\n"}\r\nb:has(c){}'
+    path = tmp_path / 'bundle.css'
+    path.write_bytes(css.encode('utf-8'))
+
+    assert analyzer.analyze_css_file(str(path), 'bundle.css', chunk_size=4096) == \
+        analyzer.analyze_css(css, 'bundle.css')
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('batch_chars', [64, 4096, 1024 * 1024])
+def test_batch_matches_per_call(mode, batch_chars):
+    rng = random.Random(batch_chars)
+    analyzer = CSSAnalyzer(mode)
+    fragments = [
+        (f'fragment-{i}.css', ''.join(rng.choice(STREAM_PIECES + RULES) for _ in range(rng.randint(0, 40))))
+        for i in range(300)
+    ]
+    fragments.append(('large.css', synthetic_css(8 * 1024)))
+
+    assert list(analyzer.analyze_batch(fragments, batch_chars)) == \
+        [analyzer.analyze_css(css_content, source_url) for source_url, css_content in fragments]
+
+
+@pytest.mark.parametrize('css, expected', TOKEN_FIXTURES.values(), ids=list(TOKEN_FIXTURES))
+def test_tokens_mode_fixtures(css, expected):
+    assert counts(CSSAnalyzer('tokens').analyze_css(css, 'fixture.css')) == expected
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        CSSAnalyzer('no-such-mode')
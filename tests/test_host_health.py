@@ -0,0 +1,87 @@
+import asyncio
+
+import httpx
+import pytest
+
+import host_health
+from crawl_errors import CrawlError
+from host_health import CircuitBreaker, HostHealth
+from stylesheet_fetcher import StylesheetFetcher
+
+CDN = 'https://cdn.shared.test'
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(host_health, 'retry_delay', lambda attempt: 0)
+
+
+def cdn_handler(request):
+    if request.url.path == '/slow.css':
+        raise httpx.ReadTimeout('timed out', request=request)
+    if request.url.path == '/unreachable.css':
+        raise httpx.ConnectTimeout('timed out', request=request)
+
+    return httpx.Response(200, text='.a{display:grid}', headers={'content-type': 'text/css'})
+
+
+async def fetch(health, fetcher, url):
+    """The crawler's stylesheet download: the fetch goes through HostHealth and failures become CrawlErrors."""
+    async def attempt():
+        response = await fetcher.fetch_response(url)
+        if response['error']:
+            raise CrawlError(response['error'], url)
+        return response['content']
+
+    try:
+        content, _ = await health.call(url, attempt)
+        return content
+    except CrawlError as e:
+        return e.code
+
+
+def crawl_sites(health, urls):
+    async def run():
+        async with StylesheetFetcher(transport=httpx.MockTransport(cdn_handler)) as fetcher:
+            return [await fetch(health, fetcher, url) for url in urls]
+
+    return asyncio.run(run())
+
+
+def test_slow_stylesheet_on_shared_host_does_not_fail_other_sites():
+    health = HostHealth()
+
+    # Several sites in a row hit the same slow file, each retrying it, before the others fetch theirs
+    results = crawl_sites(health, [f'{CDN}/slow.css'] * 4 + [f'{CDN}/site-{i}.css' for i in range(3)])
+
+    assert results[:4] == ['read_timeout'] * 4
+    assert results[4:] == ['.a{display:grid}'] * 3
+    assert health.breaker.open_hosts() == []
+
+
+def test_breaker_counts_a_request_once_however_many_tries_it_took():
+    breaker = CircuitBreaker(failures=2, cooldown=60)
+    health = HostHealth(attempts=3, breaker=breaker)
+
+    assert crawl_sites(health, [f'{CDN}/unreachable.css']) == ['connect_timeout']
+    assert breaker.hosts['cdn.shared.test'][0] == 1
+    assert breaker.open_hosts() == []
+
+    assert crawl_sites(health, [f'{CDN}/unreachable.css', f'{CDN}/site.css']) == ['connect_timeout',
+                                                                                'host_unavailable']
+    assert breaker.open_hosts() == ['cdn.shared.test']
+
+
+def test_retried_request_that_succeeds_does_not_count():
+    breaker = CircuitBreaker(failures=1, cooldown=60)
+    health = HostHealth(attempts=3, breaker=breaker)
+    failures = iter([CrawlError('connection_reset'), CrawlError('connection_reset')])
+
+    async def attempt():
+        error = next(failures, None)
+        if error is not None:
+            raise error
+        return 'ok'
+
+    assert asyncio.run(health.call(f'{CDN}/flaky.css', attempt)) == ('ok', 3)
+    assert breaker.open_hosts() == []
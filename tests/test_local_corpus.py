@@ -0,0 +1,91 @@
+import io
+import os
+import tarfile
+
+import pytest
+
+from local_corpus import DirectoryCorpus, ExtractedTarCorpus, TarCorpus, open_corpus
+
+FILES = {
+    'example.com/index.html': '<link rel="stylesheet" href="/css/site.css">',
+    'example.com/css/site.css': '.a{display:grid}',
+    'example.com/docs/index.html': 'документация',
+    'cdn.example.net/app.css?v=2': ':has(a){}',
+}
+
+
+def write_tar(path, mode, files=FILES):
+    with tarfile.open(path, mode) as archive:
+        for name, text in files.items():
+            data = text.encode('utf-8')
+            member = tarfile.TarInfo(f"./{name}")
+            member.size = len(data)
+            archive.addfile(member, io.BytesIO(data))
+
+
+def read_all(corpus):
+    try:
+        return {
+            url: corpus.read(url)
+            for url in ('https://example.com/', 'https://example.com/css/site.css', 'https://example.com/docs',
+                        'https://cdn.example.net/app.css?v=2', 'https://example.com/missing.css')
+        }
+    finally:
+        corpus.close()
+
+
+EXPECTED = {
+    'https://example.com/': FILES['example.com/index.html'],
+    'https://example.com/css/site.css': FILES['example.com/css/site.css'],
+    'https://example.com/docs': FILES['example.com/docs/index.html'],
+    'https://cdn.example.net/app.css?v=2': FILES['cdn.example.net/app.css?v=2'],
+    'https://example.com/missing.css': None,
+}
+
+
+def test_directory_corpus(tmp_path):
+    for name, text in FILES.items():
+        path = tmp_path.joinpath(*name.split('/'))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+
+    corpus = open_corpus(str(tmp_path))
+
+    assert isinstance(corpus, DirectoryCorpus)
+    assert read_all(corpus) == EXPECTED
+
+
+def test_plain_tar_is_read_on_demand(tmp_path):
+    path = str(tmp_path / 'corpus.tar')
+    write_tar(path, 'w')
+
+    corpus = open_corpus(path)
+
+    assert isinstance(corpus, TarCorpus)
+    assert read_all(corpus) == EXPECTED
+
+
+@pytest.mark.parametrize('suffix, mode', [('tar.gz', 'w:gz'), ('tar.bz2', 'w:bz2'), ('tar.xz', 'w:xz')])
+def test_compressed_tar_is_unpacked_once(tmp_path, suffix, mode):
+    path = str(tmp_path / f'corpus.{suffix}')
+    write_tar(path, mode)
+
+    corpus = open_corpus(path)
+    root = corpus.root
+
+    assert isinstance(corpus, ExtractedTarCorpus)
+    assert corpus.locate('https://example.com/css/site.css') == os.path.join(root, 'example.com', 'css', 'site.css')
+    assert read_all(corpus) == EXPECTED
+    assert not os.path.exists(root)
+
+
+def test_compressed_tar_skips_names_outside_the_corpus(tmp_path):
+    path = str(tmp_path / 'corpus.tar.gz')
+    write_tar(path, 'w:gz', {'../escape.css': 'x', 'example.com/index.html': 'ok'})
+
+    corpus = open_corpus(path)
+    try:
+        assert corpus.read('https://example.com/') == 'ok'
+        assert not os.path.exists(os.path.join(os.path.dirname(corpus.root), 'escape.css'))
+    finally:
+        corpus.close()
@@ -0,0 +1,103 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from config import CSS_FEATURES
+from report_generator import generate_summary_report
+from report_stats import ReportStats
+from results_file import iter_results, write_sites
+from results_table import ResultsTable
+from usage_stats import UsageStats
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = ['news', 'shops', 'tech']
+FEATURE_KEYS = list(CSS_FEATURES) + ['unknown-feature']
+
+
+def stylesheet(rng, source):
+    features = {
+        feature_key: {"count": rng.choice([0, 1, rng.randint(2, 40)])}
+        for feature_key in rng.sample(FEATURE_KEYS, rng.randint(0, 6))
+    }
+    return {"source": source, "total_chars": rng.randint(0, 5000), "total_lines": rng.randint(0, 80),
+            "features": features}
+
+
+def sample_results(sites, seed=0):
+    """Results with errors, empty sites, zero counts and a feature missing from CSS_FEATURES."""
+    rng = random.Random(seed)
+    results = {"total_sites": sites + 2, "categories": {}}
+
+    for i in range(sites):
+        category = results['categories'].setdefault(rng.choice(CATEGORIES), {"total_sites": 0, "sites": {}})
+        category['total_sites'] += 1
+
+        site_data = {"url": f"https://site-{i}.example.com", "inline_css": {}, "external_css": []}
+        if rng.random() < 0.4:
+            site_data['inline_css'] = stylesheet(rng, 'inline')
+        for j in range(rng.randint(0, 3)):
+            site_data['external_css'].append(stylesheet(rng, f"https://site-{i}.example.com/{j}.css"))
+        if rng.random() < 0.15:
+            site_data['error'] = rng.choice(['page_timeout', 'dns_failed', 'http_error'])
+
+        category['sites'][f"site-{i}"] = site_data
+
+    return results
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_report_without_numpy_matches_table_report(seed):
+    results = sample_results(40, seed)
+
+    assert generate_summary_report(results) == generate_summary_report(ResultsTable.from_results(results))
+
+
+def test_report_stats_match_usage_stats():
+    results = sample_results(60, seed=7)
+    stats, expected = ReportStats.from_results(results), UsageStats(ResultsTable.from_results(results))
+
+    assert stats.features == expected.features
+    assert stats.categories == expected.categories
+    assert stats.feature_sites == expected.feature_sites.tolist()
+    assert stats.site_scores == expected.site_scores.tolist()
+    assert stats.category_adopters == expected.category_adopters.tolist()
+    assert stats.error_counts() == expected.error_counts()
+    assert [list(sites) for sites in stats.category_site_order()] == \
+        [sites.tolist() for sites in expected.category_site_order()]
+
+
+def test_report_from_jsonl_and_npz_files(tmp_path):
+    results = sample_results(30, seed=3)
+    sites_path, table_path = str(tmp_path / 'sites.jsonl'), str(tmp_path / 'table.npz')
+
+    write_sites(sites_path, iter_results(results), {cat_name: list(category['sites'])
+                                                    for cat_name, category in results['categories'].items()})
+    UsageStats.save(ResultsTable.from_file(sites_path), table_path)
+
+    assert generate_summary_report(sites_path) == generate_summary_report(table_path)
+
+
+def test_report_command_does_not_import_numpy(tmp_path):
+    sites_path = str(tmp_path / 'sites.jsonl')
+    write_sites(sites_path, iter_results(sample_results(10)), {cat_name: [] for cat_name in CATEGORIES})
+
+    script = (
+        "import sys, runpy; sys.argv = ['analyze.py', 'report', '--input', sys.argv[1], '--output', sys.argv[2]]; "
+        "runpy.run_path('analyze.py', run_name='__main__'); "
+        "print(sorted(name for name in sys.modules if name.split('.')[0] in ('numpy', 'matplotlib', 'httpx')))"
+    )
+    completed = subprocess.run(
+        [sys.executable, '-c', script, sites_path, str(tmp_path / 'report.txt')],
+        cwd=os.path.join(ROOT, 'CSSAnalyze'),
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join([ROOT, os.path.join(ROOT, 'CSSAnalyze')])},
+        capture_output=True,
+        text=True
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == '[]'
+    assert (tmp_path / 'report.txt').read_text(encoding='utf-8').startswith('=' * 80)
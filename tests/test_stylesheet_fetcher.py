@@ -0,0 +1,93 @@
+import asyncio
+import gzip
+
+import httpx
+import pytest
+
+from crawl_errors import ERROR_CODES
+from stylesheet_fetcher import StylesheetFetcher
+
+CSS = '.card:has(img){display:grid}'
+MAX_BYTES = 1024
+
+
+class ChunkedBody(httpx.AsyncByteStream):
+    """A body without Content-Length, so only the streamed size can hit the cap."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def handler(request):
+    path = request.url.path
+
+    if path == '/plain.css':
+        return httpx.Response(200, text=CSS, headers={'content-type': 'text/css'})
+    if path == '/gzip.css':
+        return httpx.Response(200, content=gzip.compress(CSS.encode()),
+                              headers={'content-type': 'text/css', 'content-encoding': 'gzip'})
+    if path == '/declared-large.css':
+        return httpx.Response(200, content=b'a' * (MAX_BYTES + 1), headers={'content-type': 'text/css'})
+    if path == '/streamed-large.css':
+        return httpx.Response(200, headers={'content-type': 'text/css'}, stream=ChunkedBody([b'a' * 600] * 2))
+    if path == '/latin.css':
+        return httpx.Response(200, content=b'a{}', headers={'content-type': 'text/css; charset=no-such-charset'})
+
+    return httpx.Response(404)
+
+
+def fetch(path):
+    async def run():
+        async with StylesheetFetcher(max_bytes=MAX_BYTES, transport=httpx.MockTransport(handler)) as fetcher:
+            return await fetcher.fetch_response(f'https://cdn.test{path}')
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('path', ['/plain.css', '/gzip.css'])
+def test_fetches_plain_and_gzip_bodies(path):
+    response = fetch(path)
+
+    assert response['status'] == 200
+    assert response['error'] is None
+    assert response['content'] == CSS
+
+
+@pytest.mark.parametrize('path', ['/declared-large.css', '/streamed-large.css'])
+def test_oversized_body_is_reported(path):
+    response = fetch(path)
+
+    assert response['error'] == 'too_large'
+    assert response['content'] == ''
+
+
+def test_unknown_charset_is_reported():
+    assert fetch('/latin.css')['error'] == 'bad_charset'
+
+
+def test_not_found_keeps_status_for_the_crawler():
+    response = fetch('/missing.css')
+
+    assert response['status'] == 404
+    assert response['error'] is None
+    assert response['content'] == ''
+
+
+def test_fetcher_codes_are_described():
+    assert {'too_large', 'bad_charset'} <= ERROR_CODES.keys()
+
+
+def test_crawler_reports_fetch_failures():
+    pytest.importorskip('crawl4ai')
+    from crawl_errors import CrawlError
+    from website_crawler import WebsiteCSSCrawler
+
+    for path, code in (('/declared-large.css', 'too_large'), ('/latin.css', 'bad_charset'),
+                       ('/missing.css', 'http_error')):
+        with pytest.raises(CrawlError) as failure:
+            WebsiteCSSCrawler._check_response(fetch(path), path)
+        assert failure.value.code == code
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('crawl4ai')
+
+import website_crawler
+from config import MAX_CONCURRENT_REQUESTS
+from site_summary import empty_site_results
+from website_crawler import WebsiteCSSCrawler
+
+WEBSITES = {
+    'news': {f'news-{i}': f'https://news-{i}.test/' for i in range(15)},
+    'shops': {f'shop-{i}': f'https://shop-{i}.test/' for i in range(10)},
+}
+
+
+class FakeBrowser:
+    def __init__(self, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+def test_sites_wait_for_a_worker_before_their_deadline_starts(monkeypatch):
+    monkeypatch.setattr(website_crawler, 'AsyncWebCrawler', FakeBrowser)
+    crawler = WebsiteCSSCrawler(use_cache=False, workers=1)
+    running, peak = set(), []
+
+    async def analyze_website(browser, fetcher, name, url):
+        # Stands in for the whole site, SITE_DEADLINE included: it starts only here
+        running.add(name)
+        peak.append(len(running))
+        await asyncio.sleep(0.001)
+        running.discard(name)
+        return empty_site_results(name, url)
+
+    monkeypatch.setattr(crawler, 'analyze_website', analyze_website)
+    results = asyncio.run(crawler.analyze_all_websites(websites=WEBSITES))
+
+    assert max(peak) == MAX_CONCURRENT_REQUESTS
+    assert results['total_sites'] == 25
+    assert {cat_name: list(category['sites']) for cat_name, category in results['categories'].items()} == \
+        {cat_name: list(category_sites) for cat_name, category_sites in WEBSITES.items()}
+    assert results['categories']['shops']['sites']['shop-3']['url'] == 'https://shop-3.test/'